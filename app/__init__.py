@@ -1,3 +1,6 @@
+import os
+import tempfile
+
 from flask import Flask
 
 def create_app(config_object=None):
@@ -5,9 +8,35 @@ def create_app(config_object=None):
 
     if config_object:
         app.config.from_object(config_object)
+
+    # Serialize JSON responses with the fast NumPy/pandas-aware encoder
+    from app.serialization import FastJSONProvider
+    app.json = FastJSONProvider(app)
     
+    # Shared payload cache, visible to every worker process on the host
+    from app.services.cache_service import PayloadCache
+    cache_dir = app.config.get('CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'chartviz-cache')
+    app.extensions['payload_cache'] = PayloadCache(cache_dir)
+
+    # Bound concurrent computations per worker and shed load instead of queueing until timeout
+    from app.admission import Overloaded, create_admission_controller, overloaded_response
+    app.extensions['admission'] = create_admission_controller(app.config)
+    app.register_error_handler(Overloaded, overloaded_response)
+
+    # Guarded on-demand profiling of single requests
+    from app.profiling import create_profiling
+    profiling = create_profiling(app.config, cache_dir)
+    if profiling:
+        app.extensions['profiling'] = profiling
+
     # Register blueprints
     from app.routes import main_bp
     app.register_blueprint(main_bp)
+
+    # Keep cached payloads fresh in the background (only one process per host does the work)
+    if app.config.get('REFRESH_ENABLED', False):
+        from app.services.dashboard_service import create_refresh_scheduler
+        app.extensions['refresh_scheduler'] = create_refresh_scheduler(app)
+        app.extensions['refresh_scheduler'].start()
     
     return app
\ No newline at end of file
@@ -0,0 +1,221 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Optional
+
+from flask import current_app, jsonify, request
+
+class Overloaded(Exception):
+    """
+    Raised when a request is shed instead of being admitted.
+
+    Attributes:
+        reason: Which limit rejected the request (also the name of its counter).
+        retry_after: Suggested seconds before retrying.
+        status: HTTP status to answer with.
+    """
+
+    def __init__(self, reason: str, retry_after: float, status: int = 503):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status = status
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `capacity` tokens."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Take one token.
+
+        Returns:
+            0 if a token was taken, otherwise the seconds until one is available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class AdmissionController:
+    """
+    Per-process admission control for expensive computations.
+
+    At most `max_concurrent` computations run at once; further ones wait in a bounded queue.
+    A request is shed, rather than left to pile up until gunicorn kills the worker, when:
+      - the queue is full ('rejected_queue_full'),
+      - the expected wait, from the moving average of computation time, exceeds the queue
+        timeout ('rejected_latency'),
+      - it waited for the full queue timeout without getting a slot ('rejected_queue_timeout').
+    Optional per-client token buckets limit the request rate of each client ('rejected_rate_limit').
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 2,
+        max_queue: int = 8,
+        queue_timeout: float = 5.0,
+        rate_limit: Optional[float] = None,
+        rate_limit_burst: float = 20.0,
+        max_clients: int = 10000
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate_limit = rate_limit
+        self.rate_limit_burst = rate_limit_burst
+        self.max_clients = max_clients
+
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._buckets: OrderedDict = OrderedDict()
+        self.in_flight = 0
+        self.waiting = 0
+        # Exponentially weighted moving average of computation time, in seconds
+        self.average_latency = 0.0
+        self.counters: Dict[str, int] = {
+            'admitted': 0,
+            'rejected_queue_full': 0,
+            'rejected_queue_timeout': 0,
+            'rejected_latency': 0,
+            'rejected_rate_limit': 0,
+            'served_stale': 0,
+        }
+
+    def count(self, name: str) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def _reject(self, reason: str, retry_after: float, status: int = 503) -> Overloaded:
+        self.count(reason)
+        return Overloaded(reason, max(1.0, retry_after), status)
+
+    def expected_wait(self) -> float:
+        """Seconds a newly queued computation is expected to wait for a slot."""
+        return self.average_latency * (self.waiting + 1) / self.max_concurrent
+
+    def check_rate_limit(self, client: str) -> None:
+        """
+        Take a token from the client's bucket.
+
+        Raises:
+            Overloaded: With status 429 if the client is over its rate limit.
+        """
+        if not self.rate_limit:
+            return
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate_limit, self.rate_limit_burst)
+                # Forget the least recently seen clients so memory stays bounded
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+            wait = bucket.take()
+        if wait:
+            raise self._reject('rejected_rate_limit', wait, status=429)
+
+    @contextmanager
+    def slot(self):
+        """
+        Run the enclosed computation in a concurrency slot.
+
+        Raises:
+            Overloaded: If the computation is shed instead of admitted.
+        """
+        rejected = None
+        with self._lock:
+            retry_after = self.expected_wait()
+            if self.in_flight >= self.max_concurrent:
+                if self.waiting >= self.max_queue:
+                    rejected = 'rejected_queue_full'
+                elif retry_after > self.queue_timeout:
+                    rejected = 'rejected_latency'
+            if rejected is None:
+                self.waiting += 1
+        if rejected:
+            raise self._reject(rejected, retry_after)
+
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.in_flight += 1
+                self.counters['admitted'] += 1
+        if not acquired:
+            raise self._reject('rejected_queue_timeout', self.expected_wait())
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.in_flight -= 1
+                self.average_latency = elapsed if not self.average_latency else 0.8 * self.average_latency + 0.2 * elapsed
+            self._slots.release()
+
+    def status(self) -> dict:
+        """Counters and current load of this process, for monitoring."""
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'max_concurrent': self.max_concurrent,
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'average_latency': round(self.average_latency, 4),
+                'counters': dict(self.counters)
+            }
+
+def create_admission_controller(config) -> AdmissionController:
+    """Create the admission controller from the app configuration."""
+    return AdmissionController(
+        max_concurrent=config.get('ADMISSION_MAX_CONCURRENT', 2),
+        max_queue=config.get('ADMISSION_MAX_QUEUE', 8),
+        queue_timeout=config.get('ADMISSION_QUEUE_TIMEOUT', 5.0),
+        rate_limit=config.get('RATE_LIMIT') if config.get('RATE_LIMIT_ENABLED', False) else None,
+        rate_limit_burst=config.get('RATE_LIMIT_BURST', 20.0)
+    )
+
+def get_admission_controller() -> AdmissionController:
+    """Return the admission controller registered on the current Flask app."""
+    return current_app.extensions['admission']
+
+def client_id() -> str:
+    """
+    Identify the client by its address.
+
+    X-Forwarded-For is not read here because clients can set it to anything. Behind a proxy,
+    wrap the app in werkzeug's ProxyFix with the number of trusted hops so remote_addr is the
+    address the proxy saw.
+    """
+    return request.remote_addr or 'unknown'
+
+def rate_limited(view):
+    """Apply the per-client rate limit, if enabled, to a view."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        get_admission_controller().check_rate_limit(client_id())
+        return view(*args, **kwargs)
+    return wrapper
+
+def overloaded_response(error: Overloaded):
+    """Error handler answering shed requests with 503 (or 429) and Retry-After."""
+    response = jsonify({'error': 'Service overloaded, please retry', 'reason': error.reason})
+    response.status_code = error.status
+    response.headers['Retry-After'] = str(math.ceil(error.retry_after))
+    return response
@@ -211,4 +211,51 @@ def price_band_distribution(df: pd.DataFrame) -> altair.Chart:
             altair.Tooltip('log_value:Q', format=',', title='Log Value')
         ]
     )
-    return base_chart_props(chart, 'Distribution of Games by Price Band (Log Scale)')
\ No newline at end of file
+    return base_chart_props(chart, 'Distribution of Games by Price Band (Log Scale)')
+
+def price_review_density(df: pd.DataFrame, y_title: str, x_domain: list, y_domain: list) -> altair.Chart:
+    """
+    Create a heatmap of game counts over a grid of price against a review column.
+    
+    Each row is one pre-aggregated grid cell, so the chart size does not depend on the number of games.
+    The chart can be zoomed and panned; the page re-bins the visible range on the server.
+    
+    Args:
+        df: A pandas DataFrame containing 'x_start', 'x_end', 'y_start', 'y_end' and 'game_count' columns.
+        y_title: Title of the review axis.
+        x_domain: [min, max] of the price axis.
+        y_domain: [min, max] of the review axis.
+        
+    Returns:
+        An Altair Chart object with the common properties applied.
+    """
+    # Zooming and panning update the scale domains; the page listens to the 'zoom' signal
+    zoom = altair.selection_interval(bind='scales', name='zoom')
+    
+    chart = altair.Chart(df).mark_rect().encode(
+        x=altair.X(
+            'x_start:Q',
+            title='Price (USD)',
+            scale=altair.Scale(domain=x_domain, zero=False, nice=False)
+        ),
+        x2='x_end:Q',
+        y=altair.Y(
+            'y_start:Q',
+            title=y_title,
+            scale=altair.Scale(domain=y_domain, zero=False, nice=False)
+        ),
+        y2='y_end:Q',
+        color=altair.Color(
+            'game_count:Q',
+            title='Games',
+            scale=altair.Scale(type='log', scheme='magma', reverse=True)  # Log scale so sparse cells stay visible
+        ),
+        tooltip=[
+            altair.Tooltip('x_start:Q', format='$,.2f', title='Price From'),
+            altair.Tooltip('x_end:Q', format='$,.2f', title='Price To'),
+            altair.Tooltip('y_start:Q', format=',.1f', title=f'{y_title} From'),
+            altair.Tooltip('y_end:Q', format=',.1f', title=f'{y_title} To'),
+            altair.Tooltip('game_count:Q', format=',', title='Number of Games')
+        ]
+    ).add_params(zoom)
+    return base_chart_props(chart, f'Price vs {y_title}')
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""
+Query functions used by the services: from the sharded SQLite storage when Config.SHARD_DIR
+is set, from PostgreSQL when Config.DATABASE_URL is set, otherwise from the single SQLite
+database. The three modules have the same signatures.
+"""
+from config import Config
+
+if Config.SHARD_DIR:
+    from app.database.queries_sharded import (
+        DENSITY_COLUMNS,
+        get_dataset_version,
+        get_platform_distribution,
+        get_platforms,
+        get_price_band_distribution,
+        get_price_distribution,
+        get_price_review_bins,
+        get_price_review_extent,
+        get_review_distribution,
+        get_top_games,
+        stream_games,
+    )
+elif Config.DATABASE_URL:
+    from app.database.queries_pgsql import (
+        DENSITY_COLUMNS,
+        get_dataset_version,
+        get_platform_distribution,
+        get_platforms,
+        get_price_band_distribution,
+        get_price_distribution,
+        get_price_review_bins,
+        get_price_review_extent,
+        get_review_distribution,
+        get_top_games,
+        stream_games,
+    )
+else:
+    from app.database.queries import (
+        DENSITY_COLUMNS,
+        get_dataset_version,
+        get_platform_distribution,
+        get_platforms,
+        get_price_band_distribution,
+        get_price_distribution,
+        get_price_review_bins,
+        get_price_review_extent,
+        get_review_distribution,
+        get_top_games,
+        stream_games,
+    )
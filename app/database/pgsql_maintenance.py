@@ -0,0 +1,274 @@
+"""
+Maintenance tooling for the PostgreSQL performance objects used by queries_pgsql.py.
+
+Usage:
+    python -m app.database.pgsql_maintenance install    # GIN index, materialized views and their unique indexes
+    python -m app.database.pgsql_maintenance refresh    # REFRESH MATERIALIZED VIEW CONCURRENTLY for every view
+    python -m app.database.pgsql_maintenance check      # compare the views with the live queries for every platform
+
+The connection settings come from Config (DATABASE_URL and the DB_* pool settings).
+"""
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+import pandas as pd
+from sqlalchemy import text
+
+from app.database import queries_pgsql
+from app.database.queries_pgsql import ALL_PLATFORMS, get_engine
+
+GIN_INDEX = """
+CREATE INDEX IF NOT EXISTS steam_games_parsed_platforms_gin
+ON steam_games_parsed USING GIN (platforms)
+"""
+
+# Materialized views, in creation order. Each view has a unique index so it can be refreshed
+# CONCURRENTLY, without blocking readers.
+MATERIALIZED_VIEWS: Dict[str, Dict[str, str]] = {
+    'mv_platform_distribution': {
+        'query': """
+        SELECT
+            platform,
+            COUNT(*) AS game_count
+        FROM steam_games_parsed,
+             unnest(platforms) AS platform
+        GROUP BY platform
+        """,
+        'unique_index': '(platform)'
+    },
+    'mv_price_distribution': {
+        'query': """
+        WITH price_data AS (
+            SELECT
+                steam_appid,
+                ROUND(CAST("price_initial (USD)" AS FLOAT) / 5.0) * 5 AS rounded_price,
+                platforms
+            FROM steam_games_parsed
+            WHERE "price_initial (USD)" > 0
+        ),
+        price_data_filtered AS (
+            SELECT
+                platforms,
+                rounded_price,
+                COUNT(DISTINCT steam_appid) AS game_count
+            FROM price_data
+            GROUP BY platforms, rounded_price
+            HAVING COUNT(DISTINCT steam_appid) > 5
+        )
+        SELECT
+            platform,
+            AVG(rounded_price) AS avg_price,
+            MIN(rounded_price) AS min_price,
+            MAX(rounded_price) AS max_price
+        FROM price_data_filtered,
+             unnest(platforms) AS platform
+        GROUP BY platform
+        """,
+        'unique_index': '(platform)'
+    },
+    'mv_review_distribution': {
+        # The (review_score_desc) grouping set holds the 'all platforms' rows
+        'query': f"""
+        SELECT
+            COALESCE(u.platform, '{ALL_PLATFORMS}') AS platform,
+            review_score_desc AS review_category,
+            COUNT(DISTINCT steam_appid) AS game_count
+        FROM steam_games_parsed,
+             unnest(platforms) AS u(platform)
+        WHERE review_score_desc NOT LIKE '%user reviews%'
+        GROUP BY GROUPING SETS ((u.platform, review_score_desc), (review_score_desc))
+        """,
+        'unique_index': '(platform, review_category)'
+    },
+    'mv_top_games': {
+        'query': f"""
+        WITH candidates AS (
+            SELECT u.platform, g.*
+            FROM steam_games_parsed AS g,
+                 unnest(g.platforms) AS u(platform)
+            WHERE g.metacritic IS NOT NULL
+              AND g.total_reviews > 1000
+            UNION ALL
+            SELECT '{ALL_PLATFORMS}' AS platform, g.*
+            FROM steam_games_parsed AS g
+            WHERE g.metacritic IS NOT NULL
+              AND g.total_reviews > 1000
+              AND cardinality(g.platforms) > 0
+        ),
+        ranked AS (
+            SELECT
+                platform,
+                ROW_NUMBER() OVER (
+                    PARTITION BY platform
+                    ORDER BY metacritic DESC, total_reviews DESC, steam_appid
+                ) AS rank,
+                steam_appid,
+                name,
+                review_score,
+                total_reviews,
+                metacritic,
+                "price_initial (USD)"
+            FROM candidates
+        )
+        SELECT * FROM ranked WHERE rank <= 5
+        """,
+        'unique_index': '(platform, rank)'
+    },
+    'mv_price_band_distribution': {
+        # The (price_bracket) grouping set holds the 'all platforms' rows
+        'query': f"""
+        WITH price_data AS (
+            SELECT
+                steam_appid,
+                CASE
+                    WHEN "price_initial (USD)" <= 30 THEN '0-30'
+                    WHEN "price_initial (USD)" <= 60 THEN '31-60'
+                    WHEN "price_initial (USD)" <= 90 THEN '61-90'
+                    WHEN "price_initial (USD)" <= 120 THEN '91-120'
+                    ELSE '>120'
+                END AS price_bracket,
+                platforms
+            FROM steam_games_parsed
+            WHERE "price_initial (USD)" > 0
+        ),
+        price_data_filtered AS (
+            SELECT
+                platforms,
+                price_bracket,
+                COUNT(DISTINCT steam_appid) AS game_count
+            FROM price_data
+            GROUP BY platforms, price_bracket
+            HAVING COUNT(DISTINCT steam_appid) > 5
+        )
+        SELECT
+            COALESCE(u.platform, '{ALL_PLATFORMS}') AS platform,
+            price_bracket,
+            SUM(game_count) AS game_count
+        FROM price_data_filtered,
+             unnest(platforms) AS u(platform)
+        GROUP BY GROUPING SETS ((u.platform, price_bracket), (price_bracket))
+        """,
+        'unique_index': '(platform, price_bracket)'
+    },
+}
+
+# Aggregate functions compared by `check`
+CHECKED_FUNCTIONS = [
+    'get_platform_distribution',
+    'get_price_distribution',
+    'get_review_distribution',
+    'get_top_games',
+    'get_number_games_per_price_band',
+]
+
+def install(drop: bool = False) -> None:
+    """
+    Create the GIN index on platforms and every materialized view with its unique index.
+
+    Args:
+        drop: Drop and recreate the views, e.g. after changing their definition.
+    """
+    with get_engine().begin() as conn:
+        conn.execute(text(GIN_INDEX))
+        for name, view in MATERIALIZED_VIEWS.items():
+            if drop:
+                conn.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {name}"))
+            conn.execute(text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {name} AS {view['query']}"))
+            conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_key ON {name} {view['unique_index']}"))
+        conn.execute(text("ANALYZE steam_games_parsed"))
+
+def refresh(concurrently: bool = True) -> Dict[str, float]:
+    """
+    Refresh every materialized view.
+
+    With `concurrently`, readers keep seeing the previous contents while the view is rebuilt.
+    Each view is refreshed in its own transaction so a slow view does not hold the others back.
+
+    Args:
+        concurrently: Use REFRESH MATERIALIZED VIEW CONCURRENTLY.
+
+    Returns:
+        Seconds taken to refresh each view.
+    """
+    durations = {}
+    mode = ' CONCURRENTLY' if concurrently else ''
+    for name in MATERIALIZED_VIEWS:
+        started = time.perf_counter()
+        with get_engine().begin() as conn:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW{mode} {name}"))
+        durations[name] = round(time.perf_counter() - started, 4)
+    return durations
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Sort rows and round floats so result sets from different plans can be compared."""
+    if df.empty:
+        return df
+    df = df.round(6)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+def check() -> List[str]:
+    """
+    Compare every materialized-view result with the live query, for all platforms and each platform.
+
+    Returns:
+        A description of each mismatch; empty when the views are consistent.
+    """
+    mismatches = []
+    # Missing views would make the aggregates fall back to the live queries and compare equal
+    with get_engine().connect() as conn:
+        installed = set(conn.execute(text("SELECT matviewname FROM pg_matviews")).scalars())
+    missing = [name for name in MATERIALIZED_VIEWS if name not in installed]
+    if missing:
+        return [f"{name}: materialized view is not installed" for name in missing]
+
+    use_views = queries_pgsql.Config.PG_MATERIALIZED_VIEWS
+    try:
+        queries_pgsql.Config.PG_MATERIALIZED_VIEWS = False
+        platforms = queries_pgsql.get_platforms()
+        live = {
+            (func, platform): getattr(queries_pgsql, func)(platform)
+            for func in CHECKED_FUNCTIONS
+            for platform in [None] + platforms
+        }
+        queries_pgsql.Config.PG_MATERIALIZED_VIEWS = True
+        if sorted(queries_pgsql.get_platforms()) != sorted(platforms):
+            mismatches.append('get_platforms: platform lists differ')
+        for (func, platform), expected in live.items():
+            actual = getattr(queries_pgsql, func)(platform)
+            if func == 'get_top_games':
+                # Ties on metacritic and total_reviews may be broken differently
+                actual, expected = actual[['metacritic', 'total_reviews']], expected[['metacritic', 'total_reviews']]
+            if not _normalize(actual).equals(_normalize(expected)):
+                mismatches.append(f"{func}({platform!r}): materialized view differs from live query")
+    finally:
+        queries_pgsql.Config.PG_MATERIALIZED_VIEWS = use_views
+    return mismatches
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Manage the PostgreSQL materialized views and indexes.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    install_parser = subparsers.add_parser('install', help='create the GIN index and materialized views')
+    install_parser.add_argument('--drop', action='store_true', help='drop and recreate existing views')
+    refresh_parser = subparsers.add_parser('refresh', help='refresh the materialized views')
+    refresh_parser.add_argument('--blocking', action='store_true', help='refresh without CONCURRENTLY')
+    subparsers.add_parser('check', help='compare the materialized views with the live queries')
+    args = parser.parse_args(argv)
+
+    if args.command == 'install':
+        install(drop=args.drop)
+        print(f"Installed {len(MATERIALIZED_VIEWS)} materialized views")
+    elif args.command == 'refresh':
+        for name, seconds in refresh(concurrently=not args.blocking).items():
+            print(f"{name}: {seconds:.3f}s")
+    elif args.command == 'check':
+        mismatches = check()
+        for mismatch in mismatches:
+            print(mismatch)
+        print("OK" if not mismatches else f"{len(mismatches)} mismatches")
+        return 1 if mismatches else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,5 @@
 import os
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterator
 
 import pandas as pd
 from sqlalchemy import create_engine, text
@@ -7,7 +7,8 @@ from sqlalchemy import create_engine, text
 # Database connection setup
 try:
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    DATABASE_PATH = os.path.join(current_dir, 'data.db')
+    # SQLITE_DATABASE_PATH points the app at another dataset (e.g. a synthetic one for load tests)
+    DATABASE_PATH = os.getenv('SQLITE_DATABASE_PATH') or os.path.join(current_dir, 'data.db')
     print(f"Database path: {DATABASE_PATH}")
     engine = create_engine(f'sqlite:///{DATABASE_PATH}')
 except Exception as e:
@@ -34,6 +35,51 @@ def execute_query(query: str, params: Optional[Dict[str, Any]] = None) -> pd.Dat
         print(f"Error executing query: {e}")
         return pd.DataFrame()
 
+def iter_query(query: str, params: Optional[Dict[str, Any]] = None, batch_size: int = 1000) -> Iterator[list]:
+    """
+    Execute a SQL query and yield its results in bounded batches, without loading them all.
+    
+    The first item yielded is the list of column names; every following item is a list of at
+    most `batch_size` rows. The connection is held until the generator is exhausted or closed,
+    so closing it early (e.g. when an HTTP client disconnects) releases the cursor.
+    Errors are printed and re-raised, so a stream that ends normally is complete.
+    
+    Args:
+        query: The SQL query string to execute.
+        params: Optional dictionary of parameters to bind into the query.
+        batch_size: Maximum number of rows per batch.
+
+    Yields:
+        The column names, then lists of rows.
+    """
+    try:
+        with engine.connect() as conn:
+            # yield_per streams rows from the cursor instead of buffering the full result
+            result = conn.execution_options(yield_per=batch_size).execute(text(query), params or {})
+            yield list(result.keys())
+            for partition in result.partitions(batch_size):
+                yield partition
+    except Exception as e:
+        # Re-raise so a consumer never mistakes a short read for the complete result
+        print(f"Error streaming query: {e}")
+        raise
+
+def get_dataset_version() -> Optional[float]:
+    """
+    Return a marker that changes whenever the dataset changes.
+    
+    For SQLite this is the modification time of the database file, which is cheap enough
+    to check on every request.
+
+    Returns:
+        The database file mtime, or None if the file cannot be read.
+    """
+    try:
+        return os.path.getmtime(DATABASE_PATH)
+    except OSError as e:
+        print(f"Error reading database version: {e}")
+        return None
+
 def get_platforms() -> list:
     """
     Retrieve distinct platforms from the database.
@@ -249,5 +295,135 @@ def get_price_band_distribution(platform: Optional[str] = None) -> pd.DataFrame:
     params = {"platform": platform} if platform else None
     return execute_query(final_query, params)
 
+# Numeric columns that can be plotted against price, mapped to their SQL expressions
+DENSITY_COLUMNS = {
+    'review_score': 'review_score',
+    'metacritic': 'metacritic',
+}
+
+def get_price_review_extent(y_column: str, platform: Optional[str] = None) -> pd.DataFrame:
+    """
+    Get the range of price and of a review column, over games with both values.
+    
+    Args:
+        y_column: Review column to plot against price (a key of DENSITY_COLUMNS).
+        platform: Optional platform name to filter by.
+    
+    Returns:
+        DataFrame with a single row of 'x_min', 'x_max', 'y_min' and 'y_max'.
+    """
+    query = """
+    SELECT 
+        MIN("price_initial (USD)") AS x_min,
+        MAX("price_initial (USD)") AS x_max,
+        MIN({y}) AS y_min,
+        MAX({y}) AS y_max
+    FROM steam_games
+    WHERE "price_initial (USD)" IS NOT NULL
+      AND {y} IS NOT NULL
+    {platform_filter}
+    """
+    # EXISTS keeps one row per game, unlike joining json_each
+    platform_filter = "AND EXISTS (SELECT 1 FROM json_each(platforms) WHERE json_each.value = :platform)" if platform else ""
+    final_query = query.format(y=DENSITY_COLUMNS[y_column], platform_filter=platform_filter)
+    params = {"platform": platform} if platform else None
+    return execute_query(final_query, params)
+
+def get_price_review_bins(
+    y_column: str,
+    x_range: tuple,
+    y_range: tuple,
+    bins: tuple,
+    platform: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Count games on a 2D grid of price against a review column.
+    
+    The binning runs in the database, so only non-empty cells are returned, never individual games.
+    Values on the upper edge of the range fall into the last cell.
+    
+    Args:
+        y_column: Review column to plot against price (a key of DENSITY_COLUMNS).
+        x_range: (min, max) price range to bin.
+        y_range: (min, max) review range to bin.
+        bins: Number of (x, y) cells.
+        platform: Optional platform name to filter by.
+    
+    Returns:
+        DataFrame with 'x_bin', 'y_bin' and 'game_count' for each non-empty cell.
+    """
+    query = """
+    SELECT 
+        MIN(CAST(("price_initial (USD)" - :x0) / :dx AS INTEGER), :nx - 1) AS x_bin,
+        MIN(CAST(({y} - :y0) / :dy AS INTEGER), :ny - 1) AS y_bin,
+        COUNT(*) AS game_count
+    FROM steam_games
+    WHERE "price_initial (USD)" BETWEEN :x0 AND :x1
+      AND {y} BETWEEN :y0 AND :y1
+    {platform_filter}
+    GROUP BY x_bin, y_bin
+    """
+    platform_filter = "AND EXISTS (SELECT 1 FROM json_each(platforms) WHERE json_each.value = :platform)" if platform else ""
+    final_query = query.format(y=DENSITY_COLUMNS[y_column], platform_filter=platform_filter)
+    (x0, x1), (y0, y1), (nx, ny) = x_range, y_range, bins
+    params = {
+        "x0": x0, "x1": x1, "dx": (x1 - x0) / nx, "nx": nx,
+        "y0": y0, "y1": y1, "dy": (y1 - y0) / ny, "ny": ny,
+    }
+    if platform:
+        params["platform"] = platform
+    return execute_query(final_query, params)
+
+def stream_games(
+    platform: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_review: Optional[float] = None,
+    max_review: Optional[float] = None,
+    review_category: Optional[str] = None,
+    batch_size: int = 1000
+) -> Iterator[list]:
+    """
+    Stream the rows of 'steam_games' matching the given filters.
+    
+    Args:
+        platform: Optional platform name to filter by.
+        min_price: Optional lower bound on the initial price (inclusive).
+        max_price: Optional upper bound on the initial price (inclusive).
+        min_review: Optional lower bound on review_score (inclusive).
+        max_review: Optional upper bound on review_score (inclusive).
+        review_category: Optional exact review_score_desc to filter by.
+        batch_size: Maximum number of rows per batch.
+    
+    Yields:
+        The column names, then lists of rows (see iter_query).
+    """
+    query = """
+    SELECT *
+    FROM steam_games
+    WHERE 1=1
+    {filters}
+    """
+    conditions = {
+        "platform": "AND EXISTS (SELECT 1 FROM json_each(platforms) WHERE json_each.value = :platform)",
+        "min_price": 'AND "price_initial (USD)" >= :min_price',
+        "max_price": 'AND "price_initial (USD)" <= :max_price',
+        "min_review": "AND review_score >= :min_review",
+        "max_review": "AND review_score <= :max_review",
+        "review_category": "AND review_score_desc = :review_category",
+    }
+    values = {
+        "platform": platform,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_review": min_review,
+        "max_review": max_review,
+        "review_category": review_category,
+    }
+    # Only bind the filters that were given
+    params = {key: value for key, value in values.items() if value is not None}
+    filters = "\n    ".join(conditions[key] for key in params)
+    return iter_query(query.format(filters=filters), params, batch_size)
+
 # Cleanup connection
 engine.dispose()
\ No newline at end of file
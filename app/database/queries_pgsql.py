@@ -1,29 +1,54 @@
+import threading
+
 import pandas as pd
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from pandas import DataFrame
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator
+
+from config import Config
+
+# Platform value used for the 'all platforms' rows of the materialized views.
+ALL_PLATFORMS = '*'
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+def get_engine() -> Engine:
+    """
+    Return the shared database engine, creating it on first use.
 
-# Setup database connection engine.
-try:
-    DATABASE_URL = ''
-    engine = create_engine(DATABASE_URL)
-except Exception as e:
-    # Log the error if the engine cannot be initialized.
-    print(f"Error connecting to database: {e}")
+    The engine is created lazily so that each gunicorn worker builds its own connection pool
+    after forking. Pool size, overflow, pre-ping and the per-statement timeout come from Config.
+
+    Returns:
+        Engine: The SQLAlchemy engine for Config.DATABASE_URL.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_engine(
+                Config.DATABASE_URL,
+                pool_size=Config.DB_POOL_SIZE,
+                max_overflow=Config.DB_MAX_OVERFLOW,
+                pool_pre_ping=Config.DB_POOL_PRE_PING,
+                connect_args={'options': f'-c statement_timeout={Config.DB_STATEMENT_TIMEOUT_MS}'}
+            )
+        return _engine
 
 def execute_query(query: str, params: Optional[Dict[str, Any]] = None) -> DataFrame:
     """
     Execute a SQL query and return the results as a Pandas DataFrame.
-    
+
     Parameters:
         query (str): The SQL query to execute.
         params (Optional[Dict[str, Any]]): Optional parameters for the query.
-    
+
     Returns:
         DataFrame: Query results as a DataFrame; empty DataFrame on error.
     """
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             # Execute the query with the passed parameters (if any)
             result = conn.execute(text(query), params or {})
             # Fetch all rows and use result keys as DataFrame columns.
@@ -32,208 +57,499 @@ def execute_query(query: str, params: Optional[Dict[str, Any]] = None) -> DataFr
         print(f"Error executing query: {e}")
         return pd.DataFrame()
 
-def get_platforms() -> list:
+def iter_query(query: str, params: Optional[Dict[str, Any]] = None, batch_size: int = 1000) -> Iterator[list]:
     """
-    Retrieve a distinct list of platforms from the 'steam_games_parsed' table.
-    
+    Execute a SQL query through a server-side cursor and yield its results in bounded batches.
+
+    The first item yielded is the list of column names; every following item is a list of at
+    most `batch_size` rows. The connection is held until the generator is exhausted or closed,
+    so closing it early (e.g. when an HTTP client disconnects) closes the cursor.
+    Errors are printed and re-raised, so a stream that ends normally is complete.
+
+    Parameters:
+        query (str): The SQL query to execute.
+        params (Optional[Dict[str, Any]]): Optional parameters for the query.
+        batch_size (int): Maximum number of rows per batch.
+
+    Yields:
+        list: The column names, then lists of rows.
+    """
+    try:
+        with get_engine().connect() as conn:
+            # yield_per makes psycopg2 use a named (server-side) cursor
+            result = conn.execution_options(yield_per=batch_size).execute(text(query), params or {})
+            yield list(result.keys())
+            for partition in result.partitions(batch_size):
+                yield partition
+    except Exception as e:
+        # Re-raise so a consumer never mistakes a short read for the complete result
+        print(f"Error streaming query: {e}")
+        raise
+
+def _run_prepared(name: str, *args: Any) -> DataFrame:
+    """Execute one of the PREPARED_STATEMENTS, raising on error (see execute_prepared)."""
+    with get_engine().connect() as conn:
+        prepared = conn.info.setdefault('prepared_statements', set())
+        if name not in prepared:
+            param_types = f" ({', '.join('text' for _ in args)})" if args else ''
+            conn.execute(text(f"PREPARE {name}{param_types} AS {PREPARED_STATEMENTS[name]}"))
+            prepared.add(name)
+
+        params = {f'p{i}': value for i, value in enumerate(args)}
+        arguments = f"({', '.join(f':{key}' for key in params)})" if params else ''
+        result = conn.execute(text(f"EXECUTE {name}{arguments}"), params)
+        return pd.DataFrame(result.fetchall(), columns=result.keys())
+
+def execute_prepared(name: str, *args: Any) -> DataFrame:
+    """
+    Execute one of the PREPARED_STATEMENTS as a server-side prepared statement.
+
+    The statement is prepared once per database connection (tracked in the connection's info
+    dict, which SQLAlchemy clears when the connection is replaced) and then run with EXECUTE,
+    so PostgreSQL skips parsing and planning on every subsequent call.
+
+    Parameters:
+        name (str): Key of the statement in PREPARED_STATEMENTS.
+        *args: Values for the statement's $1..$n text parameters.
+
     Returns:
-        list: A list of unique platforms.
+        DataFrame: Query results as a DataFrame; empty DataFrame on error.
+    """
+    try:
+        return _run_prepared(name, *args)
+    except Exception as e:
+        print(f"Error executing prepared statement {name}: {e}")
+        return pd.DataFrame()
+
+def get_dataset_version() -> Optional[str]:
+    """
+    Return a change marker for the 'steam_games_parsed' table and its materialized views.
+
+    Combines the cumulative insert/update/delete counters from pg_stat_user_tables, so any
+    write to the table, or any refresh of the views that changes their rows, produces a new marker.
+
+    Returns:
+        Optional[str]: The change marker, or None if it cannot be read.
     """
     query = """
-    SELECT DISTINCT unnest(platforms) as platform
+    SELECT SUM(n_tup_ins) || '-' || SUM(n_tup_upd) || '-' || SUM(n_tup_del) AS version
+    FROM pg_stat_user_tables
+    WHERE relname = 'steam_games_parsed'
+       OR relname LIKE 'mv\\_%'
+    """
+    version = execute_query(query)
+    if version.empty:
+        return None
+    return version['version'].iloc[0]
+
+# Live queries against 'steam_games_parsed'. The *_platform variants filter with
+# `platforms @> ARRAY[$1]`, which is served by the GIN index on platforms.
+
+PLATFORMS = """
+SELECT DISTINCT unnest(platforms) AS platform
+FROM steam_games_parsed
+"""
+
+PLATFORM_DISTRIBUTION = """
+SELECT
+    platform,
+    COUNT(*) AS game_count
+FROM steam_games_parsed,
+     unnest(platforms) AS platform
+{platform_filter}
+GROUP BY platform
+ORDER BY game_count DESC
+"""
+
+PRICE_DISTRIBUTION = """
+WITH price_data AS (
+    SELECT
+        steam_appid,
+        ROUND(CAST("price_initial (USD)" AS FLOAT) / 5.0) * 5 AS rounded_price,
+        platforms
+    FROM steam_games_parsed
+    WHERE "price_initial (USD)" > 0
+    {array_filter}
+),
+price_data_filtered AS (
+    SELECT
+        platforms,
+        rounded_price,
+        COUNT(DISTINCT steam_appid) AS game_count
+    FROM price_data
+    GROUP BY platforms, rounded_price
+    HAVING COUNT(DISTINCT steam_appid) > 5
+)
+SELECT
+    platform,
+    AVG(rounded_price) AS avg_price,
+    MIN(rounded_price) AS min_price,
+    MAX(rounded_price) AS max_price
+FROM price_data_filtered,
+     unnest(platforms) AS platform
+{platform_filter}
+GROUP BY platform
+ORDER BY avg_price DESC
+"""
+
+REVIEW_DISTRIBUTION = """
+SELECT
+    review_score_desc AS review_category,
+    COUNT(DISTINCT steam_appid) AS game_count
+FROM steam_games_parsed
+WHERE review_score_desc NOT LIKE '%user reviews%'
+  AND cardinality(platforms) > 0
+{array_filter}
+GROUP BY review_score_desc
+ORDER BY game_count DESC
+"""
+
+TOP_GAMES = """
+SELECT
+    name,
+    review_score,
+    total_reviews,
+    metacritic,
+    "price_initial (USD)"
+FROM steam_games_parsed
+WHERE metacritic IS NOT NULL
+  AND total_reviews > 1000
+  AND cardinality(platforms) > 0
+{array_filter}
+ORDER BY metacritic DESC, total_reviews DESC
+LIMIT 5
+"""
+
+PRICE_BAND_DISTRIBUTION = """
+WITH price_data AS (
+    SELECT
+        steam_appid,
+        CASE
+            WHEN "price_initial (USD)" <= 30 THEN '0-30'
+            WHEN "price_initial (USD)" <= 60 THEN '31-60'
+            WHEN "price_initial (USD)" <= 90 THEN '61-90'
+            WHEN "price_initial (USD)" <= 120 THEN '91-120'
+            ELSE '>120'
+        END AS price_bracket,
+        platforms
     FROM steam_games_parsed
-    GROUP BY unnest(platforms)
+    WHERE "price_initial (USD)" > 0
+    {array_filter}
+),
+price_data_filtered AS (
+    SELECT
+        platforms,
+        price_bracket,
+        COUNT(DISTINCT steam_appid) AS game_count
+    FROM price_data
+    GROUP BY platforms, price_bracket
+    HAVING COUNT(DISTINCT steam_appid) > 5
+)
+SELECT
+    price_bracket,
+    SUM(game_count) AS game_count
+FROM price_data_filtered{unnest}
+GROUP BY price_bracket
+ORDER BY price_bracket
+"""
+
+def _live(query: str, filtered: bool) -> str:
+    """Fill in the platform filter placeholders of a live query."""
+    return query.format(
+        array_filter="AND platforms @> ARRAY[$1]" if filtered else "",
+        platform_filter="WHERE platforms @> ARRAY[$1] AND platform = $1" if filtered else "",
+        # Without a filter every platform of a price group counts, as in the SQLite queries
+        unnest="" if filtered else ",\n     unnest(platforms) AS platform"
+    )
+
+PREPARED_STATEMENTS: Dict[str, str] = {
+    # Live queries
+    'platforms': PLATFORMS,
+    'platform_distribution': _live(PLATFORM_DISTRIBUTION, False),
+    'platform_distribution_platform': _live(PLATFORM_DISTRIBUTION, True),
+    'price_distribution': _live(PRICE_DISTRIBUTION, False),
+    'price_distribution_platform': _live(PRICE_DISTRIBUTION, True),
+    'review_distribution': _live(REVIEW_DISTRIBUTION, False),
+    'review_distribution_platform': _live(REVIEW_DISTRIBUTION, True),
+    'top_games': _live(TOP_GAMES, False),
+    'top_games_platform': _live(TOP_GAMES, True),
+    'price_band_distribution': _live(PRICE_BAND_DISTRIBUTION, False),
+    'price_band_distribution_platform': _live(PRICE_BAND_DISTRIBUTION, True),
+    # Materialized views (created by app/database/pgsql_maintenance.py). Views holding one row
+    # per platform treat a NULL $1 as 'all platforms'; the others store those rows under ALL_PLATFORMS.
+    'mv_platforms': """
+    SELECT platform FROM mv_platform_distribution
+    """,
+    'mv_platform_distribution': """
+    SELECT platform, game_count
+    FROM mv_platform_distribution
+    WHERE $1::text IS NULL OR platform = $1
+    ORDER BY game_count DESC
+    """,
+    'mv_price_distribution': """
+    SELECT platform, avg_price, min_price, max_price
+    FROM mv_price_distribution
+    WHERE $1::text IS NULL OR platform = $1
+    ORDER BY avg_price DESC
+    """,
+    'mv_review_distribution': """
+    SELECT review_category, game_count
+    FROM mv_review_distribution
+    WHERE platform = $1
+    ORDER BY game_count DESC
+    """,
+    'mv_top_games': """
+    SELECT name, review_score, total_reviews, metacritic, "price_initial (USD)"
+    FROM mv_top_games
+    WHERE platform = $1
+    ORDER BY rank
+    """,
+    'mv_price_band_distribution': """
+    SELECT price_bracket, game_count
+    FROM mv_price_band_distribution
+    WHERE platform = $1
+    ORDER BY price_bracket
+    """,
+}
+
+def _execute_aggregate(name: str, platform: Optional[str], all_platforms: Any) -> DataFrame:
+    """
+    Run an aggregate from its materialized view, or live when PG_MATERIALIZED_VIEWS is off.
+
+    If the view statement fails (e.g. the views were never installed), the live query is used.
+
+    Parameters:
+        name (str): Base name of the statement.
+        platform (Optional[str]): Filter results by this platform, if specified.
+        all_platforms (Any): Value passed to the view statement when no platform is given.
+
+    Returns:
+        DataFrame: The aggregate rows.
     """
-    platforms = execute_query(query)
+    if Config.PG_MATERIALIZED_VIEWS:
+        try:
+            return _run_prepared(f'mv_{name}', platform or all_platforms)
+        except Exception as e:
+            print(f"Materialized view mv_{name} unavailable, running the live query: {e}")
+    if platform:
+        return execute_prepared(f'{name}_platform', platform)
+    return execute_prepared(name)
+
+def get_platforms() -> list:
+    """
+    Retrieve a distinct list of platforms from the 'steam_games_parsed' table.
+
+    Returns:
+        list: A list of unique platforms.
+    """
+    platforms = None
+    if Config.PG_MATERIALIZED_VIEWS:
+        try:
+            platforms = _run_prepared('mv_platforms')
+        except Exception as e:
+            print(f"Materialized view mv_platform_distribution unavailable, running the live query: {e}")
+    if platforms is None:
+        platforms = execute_prepared('platforms')
+    if platforms.empty:
+        return []
     # Convert the 'platform' column into a list.
     return list(platforms['platform'])
 
 def get_platform_distribution(platform: Optional[str] = None) -> DataFrame:
     """
     Retrieve the distribution of games per platform.
-    
+
     Parameters:
         platform (Optional[str]): Filter results by this platform, if specified.
-    
+
     Returns:
         DataFrame: Contains 'platform' and the corresponding game count.
     """
-    query = """
-    SELECT 
-        platform,
-        COUNT(*) AS game_count
-    FROM (
-        SELECT unnest(platforms) AS platform
-        FROM steam_games_parsed
-    ) AS p
-    WHERE 1=1
-    {platform_filter}
-    GROUP BY platform
-    ORDER BY game_count DESC
-    """
-    # Construct filter clause if platform is provided.
-    platform_filter = "AND (:platform IS NULL OR platform = :platform)" if platform else ""
-    final_query = query.format(platform_filter=platform_filter)
-    query_params = {"platform": platform} if platform else None
-    return execute_query(final_query, query_params)
+    return _execute_aggregate('platform_distribution', platform, None)
 
 def get_price_distribution(platform: Optional[str] = None) -> DataFrame:
     """
     Retrieve average, minimum, and maximum prices per platform based on a price band.
-    
+
     Parameters:
         platform (Optional[str]): Filter results by this platform, if specified.
-    
+
     Returns:
         DataFrame: Contains price distribution stats for each platform.
     """
-    query = """
-    WITH price_data AS (
-        SELECT 
-            steam_appid,
-            ROUND(CAST("price_initial (USD)" AS FLOAT) / 5.0) * 5 AS rounded_price,
-            platforms
-        FROM steam_games_parsed
-        WHERE "price_initial (USD)" > 0
-    ),
-    price_data_filtered AS (
-        SELECT 
-            platforms,
-            rounded_price,
-            COUNT(DISTINCT steam_appid) AS game_count
-        FROM price_data
-        GROUP BY platforms, rounded_price 
-        HAVING COUNT(DISTINCT steam_appid) > 5
-    )
-    SELECT 
-        platform,
-        AVG(rounded_price) AS avg_price,
-        MIN(rounded_price) AS min_price,
-        MAX(rounded_price) AS max_price
-    FROM price_data_filtered,
-         unnest(platforms) AS platform
-    WHERE 1=1
-    {platform_filter}
-    GROUP BY platform
-    ORDER BY avg_price DESC
-    """
-    platform_filter = "AND (:platform IS NULL OR platform = :platform)" if platform else ""
-    final_query = query.format(platform_filter=platform_filter)
-    query_params = {"platform": platform} if platform else None
-    return execute_query(final_query, query_params)
+    return _execute_aggregate('price_distribution', platform, None)
 
 def get_review_distribution(platform: Optional[str] = None) -> DataFrame:
     """
     Retrieve the distribution of games by review category.
-    
+
     Parameters:
         platform (Optional[str]): Filter results by this platform, if specified.
-    
+
     Returns:
         DataFrame: Contains review categories and the corresponding game counts.
     """
-    query = """
-    SELECT 
-        review_score_desc AS review_category,
-        COUNT(DISTINCT steam_appid) AS game_count
-    FROM steam_games_parsed,
-         unnest(platforms) AS platform
-    WHERE review_score_desc NOT LIKE '%user reviews%'
-    {platform_filter}
-    GROUP BY review_score_desc
-    ORDER BY game_count DESC
-    """
-    platform_filter = "AND (:platform IS NULL OR platform = :platform)" if platform else ""
-    final_query = query.format(platform_filter=platform_filter)
-    query_params = {"platform": platform} if platform else None
-    return execute_query(final_query, query_params)
+    return _execute_aggregate('review_distribution', platform, ALL_PLATFORMS)
 
 def get_top_games(platform: Optional[str] = None) -> DataFrame:
     """
     Retrieve top-rated games with metacritic scores and high review counts.
-    
+
     Parameters:
         platform (Optional[str]): Filter results by this platform, if specified.
-    
+
     Returns:
         DataFrame: Contains top 5 games meeting the criteria.
     """
-    query = """
-    SELECT 
-        name,
-        review_score,
-        total_reviews,
-        metacritic,
-        "price_initial (USD)"
-    FROM steam_games_parsed,
-         unnest(platforms) AS platform
-    WHERE metacritic IS NOT NULL
-      AND total_reviews > 1000
-    {platform_filter}
-    GROUP BY steam_appid, name, review_score, total_reviews, metacritic, "price_initial (USD)"
-    ORDER BY metacritic DESC, total_reviews DESC
-    LIMIT 5
-    """
-    platform_filter = "AND (:platform IS NULL OR platform = :platform)" if platform else ""
-    final_query = query.format(platform_filter=platform_filter)
-    query_params = {"platform": platform} if platform else None
-    return execute_query(final_query, query_params)
+    return _execute_aggregate('top_games', platform, ALL_PLATFORMS)
 
 def get_number_games_per_price_band(platform: Optional[str] = None) -> DataFrame:
     """
     Get the number of games per price band.
-    
+
     Price bands are defined as:
         - '0-30'
         - '31-60'
         - '61-90'
         - '91-120'
         - '>120'
-    
+
     Parameters:
         platform (Optional[str]): Filter results by this platform, if specified.
-    
+
     Returns:
         DataFrame: Contains price brackets and the corresponding game counts.
     """
+    return _execute_aggregate('price_band_distribution', platform, ALL_PLATFORMS)
+
+# Same name as the SQLite module, so the dashboard service can import either.
+get_price_band_distribution = get_number_games_per_price_band
+
+# Numeric columns that can be plotted against price, mapped to their SQL expressions
+DENSITY_COLUMNS = {
+    'review_score': 'review_score',
+    'metacritic': 'metacritic',
+}
+
+def get_price_review_extent(y_column: str, platform: Optional[str] = None) -> DataFrame:
+    """
+    Get the range of price and of a review column, over games with both values.
+
+    Parameters:
+        y_column (str): Review column to plot against price (a key of DENSITY_COLUMNS).
+        platform (Optional[str]): Filter results by this platform, if specified.
+
+    Returns:
+        DataFrame: A single row of 'x_min', 'x_max', 'y_min' and 'y_max'.
+    """
     query = """
-    WITH price_data AS (
-        SELECT 
-            steam_appid,
-            CASE
-                WHEN "price_initial (USD)" <= 30 THEN '0-30'
-                WHEN "price_initial (USD)" <= 60 THEN '31-60'
-                WHEN "price_initial (USD)" <= 90 THEN '61-90'
-                WHEN "price_initial (USD)" <= 120 THEN '91-120'
-                ELSE '>120'
-            END AS price_bracket,
-            platforms
-        FROM steam_games_parsed
-        WHERE "price_initial (USD)" > 0
-    ),
-    price_data_filtered AS (
-        SELECT 
-            platforms,
-            price_bracket,
-            COUNT(DISTINCT steam_appid) AS game_count
-        FROM price_data
-        GROUP BY platforms, price_bracket 
-        HAVING COUNT(DISTINCT steam_appid) > 5
-    )
-    SELECT 
-        price_bracket,
-        SUM(game_count) AS game_count
-    FROM price_data_filtered,
-         unnest(platforms) AS platform
-    WHERE 1=1
+    SELECT
+        MIN("price_initial (USD)") AS x_min,
+        MAX("price_initial (USD)") AS x_max,
+        MIN({y}) AS y_min,
+        MAX({y}) AS y_max
+    FROM steam_games_parsed
+    WHERE "price_initial (USD)" IS NOT NULL
+      AND {y} IS NOT NULL
     {platform_filter}
-    GROUP BY price_bracket
-    ORDER BY price_bracket
     """
-    platform_filter = "AND (:platform IS NULL OR platform = :platform)" if platform else ""
-    final_query = query.format(platform_filter=platform_filter)
+    platform_filter = "AND platforms @> ARRAY[:platform]" if platform else ""
+    final_query = query.format(y=DENSITY_COLUMNS[y_column], platform_filter=platform_filter)
     query_params = {"platform": platform} if platform else None
     return execute_query(final_query, query_params)
 
-# Cleanup connection resources when the script finishes to ensure no open connections.
-engine.dispose()
\ No newline at end of file
+def get_price_review_bins(
+    y_column: str,
+    x_range: tuple,
+    y_range: tuple,
+    bins: tuple,
+    platform: Optional[str] = None
+) -> DataFrame:
+    """
+    Count games on a 2D grid of price against a review column.
+
+    The binning runs in the database, so only non-empty cells are returned, never individual games.
+    Values on the upper edge of the range fall into the last cell.
+
+    Parameters:
+        y_column (str): Review column to plot against price (a key of DENSITY_COLUMNS).
+        x_range (tuple): (min, max) price range to bin.
+        y_range (tuple): (min, max) review range to bin.
+        bins (tuple): Number of (x, y) cells.
+        platform (Optional[str]): Filter results by this platform, if specified.
+
+    Returns:
+        DataFrame: 'x_bin', 'y_bin' and 'game_count' for each non-empty cell.
+    """
+    query = """
+    SELECT
+        LEAST(FLOOR(("price_initial (USD)" - :x0) / :dx)::int, :nx - 1) AS x_bin,
+        LEAST(FLOOR(({y} - :y0) / :dy)::int, :ny - 1) AS y_bin,
+        COUNT(*) AS game_count
+    FROM steam_games_parsed
+    WHERE "price_initial (USD)" BETWEEN :x0 AND :x1
+      AND {y} BETWEEN :y0 AND :y1
+    {platform_filter}
+    GROUP BY 1, 2
+    """
+    platform_filter = "AND platforms @> ARRAY[:platform]" if platform else ""
+    final_query = query.format(y=DENSITY_COLUMNS[y_column], platform_filter=platform_filter)
+    (x0, x1), (y0, y1), (nx, ny) = x_range, y_range, bins
+    query_params = {
+        "x0": x0, "x1": x1, "dx": (x1 - x0) / nx, "nx": nx,
+        "y0": y0, "y1": y1, "dy": (y1 - y0) / ny, "ny": ny,
+    }
+    if platform:
+        query_params["platform"] = platform
+    return execute_query(final_query, query_params)
+
+def stream_games(
+    platform: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_review: Optional[float] = None,
+    max_review: Optional[float] = None,
+    review_category: Optional[str] = None,
+    batch_size: int = 1000
+) -> Iterator[list]:
+    """
+    Stream the rows of 'steam_games_parsed' matching the given filters.
+
+    Parameters:
+        platform (Optional[str]): Filter results by this platform, if specified.
+        min_price (Optional[float]): Lower bound on the initial price (inclusive).
+        max_price (Optional[float]): Upper bound on the initial price (inclusive).
+        min_review (Optional[float]): Lower bound on review_score (inclusive).
+        max_review (Optional[float]): Upper bound on review_score (inclusive).
+        review_category (Optional[str]): Exact review_score_desc to filter by.
+        batch_size (int): Maximum number of rows per batch.
+
+    Yields:
+        list: The column names, then lists of rows (see iter_query).
+    """
+    query = """
+    SELECT *
+    FROM steam_games_parsed
+    WHERE 1=1
+    {filters}
+    """
+    conditions = {
+        "platform": "AND platforms @> ARRAY[:platform]",
+        "min_price": 'AND "price_initial (USD)" >= :min_price',
+        "max_price": 'AND "price_initial (USD)" <= :max_price',
+        "min_review": "AND review_score >= :min_review",
+        "max_review": "AND review_score <= :max_review",
+        "review_category": "AND review_score_desc = :review_category",
+    }
+    values = {
+        "platform": platform,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_review": min_review,
+        "max_review": max_review,
+        "review_category": review_category,
+    }
+    # Only bind the filters that were given
+    query_params = {key: value for key, value in values.items() if value is not None}
+    filters = "\n    ".join(conditions[key] for key in query_params)
+    return iter_query(query.format(filters=filters), query_params, batch_size)
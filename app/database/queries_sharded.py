@@ -0,0 +1,483 @@
+"""
+Queries over 'steam_games' partitioned across several SQLite files (shards).
+
+Rows are assigned to a shard by a hash of steam_appid (see SHARD_HASH_SQL), so every row of a
+game lives in the same shard and per-game distinct counts can be added across shards. Each
+function runs a partial aggregate on every shard in parallel and merges the results, and keeps
+the signature and result columns of the same function in queries.py.
+
+The shard files and their manifest are written by `python -m app.database.sharding reshard`.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Dict, Iterator, List, Tuple
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from config import Config
+
+MANIFEST_NAME = 'shards.json'
+
+# Knuth's multiplicative hash of steam_appid, reduced to a shard number. The low bits of the
+# product only mirror the low bits of the appid (Steam appids are multiples of 10), so the shard
+# is taken from the high 16 bits of the 32-bit hash. Written in SQL so resharding runs inside
+# SQLite; shard_for() is the same function in Python.
+SHARD_HASH_SQL = "(((ABS(COALESCE(steam_appid, 0)) * 2654435761) & 4294967295) >> 16) % :shard_count"
+
+def shard_for(steam_appid: Optional[int], shard_count: int) -> int:
+    """Return the shard a game belongs to."""
+    return (((abs(steam_appid or 0) * 2654435761) & 0xFFFFFFFF) >> 16) % shard_count
+
+_shards: Optional[List[Engine]] = None
+_shards_key: Optional[tuple] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_shards_lock = threading.Lock()
+
+def read_manifest(directory: str) -> Dict[str, Any]:
+    """
+    Read the manifest describing a shard directory.
+
+    Args:
+        directory: The shard directory.
+
+    Returns:
+        The manifest, with 'shard_count' and the shard 'files' in shard order.
+    """
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+def _shard_set() -> Tuple[List[Engine], ThreadPoolExecutor]:
+    global _shards, _shards_key, _executor
+    # reshard replaces the directory, so a new manifest file means a new shard set
+    manifest_stat = os.stat(os.path.join(Config.SHARD_DIR, MANIFEST_NAME))
+    key = (Config.SHARD_DIR, manifest_stat.st_ino, manifest_stat.st_mtime_ns)
+    with _shards_lock:
+        if _shards is None or _shards_key != key:
+            manifest = read_manifest(Config.SHARD_DIR)
+            if _shards is not None:
+                # Close pooled connections, which still point at the replaced files. The old
+                # executor is not shut down: queries that already hold it still submit to it,
+                # and its threads exit once it is garbage-collected.
+                for engine in _shards:
+                    engine.dispose()
+            # Read-only, so a stale engine never creates an empty file in place of a replaced shard
+            _shards = [
+                create_engine(f"sqlite:///file:{os.path.join(Config.SHARD_DIR, name)}?mode=ro&uri=true")
+                for name in manifest['files']
+            ]
+            _shards_key = key
+            # SQLite releases the GIL while a query runs, so shards are scanned concurrently
+            _executor = ThreadPoolExecutor(max_workers=len(_shards), thread_name_prefix='shard-query')
+        return _shards, _executor
+
+def get_shards() -> List[Engine]:
+    """
+    Return one engine per shard of Config.SHARD_DIR, creating them on first use.
+
+    Engines are created lazily so that each gunicorn worker opens its own connections after
+    forking, and are rebuilt whenever the shard manifest is replaced (e.g. by reshard).
+
+    Returns:
+        The shard engines, in shard order.
+    """
+    return _shard_set()[0]
+
+def _query_shard(engine: Engine, query: str, params: Optional[Dict[str, Any]]) -> pd.DataFrame:
+    with engine.connect() as conn:
+        result = conn.execute(text(query), params or {})
+        return pd.DataFrame(result.fetchall(), columns=result.keys())
+
+def scatter_query(query: str, params: Optional[Dict[str, Any]] = None) -> Optional[List[pd.DataFrame]]:
+    """
+    Execute a SQL query on every shard in parallel.
+
+    Args:
+        query: The SQL query string to execute.
+        params: Optional dictionary of parameters to bind into the query.
+
+    Returns:
+        One DataFrame per shard, or None if any shard failed (a partial result would be wrong).
+    """
+    try:
+        for attempt in range(2):
+            shards, executor = _shard_set()
+            try:
+                return list(executor.map(lambda engine: _query_shard(engine, query, params), shards))
+            except Exception:
+                # reshard may have replaced the shard files during the query: retry once on the new set
+                if attempt or get_shards() is shards:
+                    raise
+    except Exception as e:
+        print(f"Error executing sharded query: {e}")
+        return None
+
+def _concat(partials: List[pd.DataFrame]) -> pd.DataFrame:
+    return pd.concat(partials, ignore_index=True)
+
+def _explode_platforms(df: pd.DataFrame, platform: Optional[str]) -> pd.DataFrame:
+    # Same rows as joining json_each(platforms): one per platform in each row's array
+    df = df.assign(platform=df['platforms'].map(json.loads)).explode('platform')
+    df = df[df['platform'].notna()]
+    return df[df['platform'] == platform] if platform else df
+
+def get_dataset_version() -> Optional[float]:
+    """
+    Return a marker that changes whenever the dataset changes.
+
+    Returns:
+        The latest mtime of the shard files and manifest, or None if they cannot be read.
+    """
+    try:
+        manifest = read_manifest(Config.SHARD_DIR)
+        names = [MANIFEST_NAME] + manifest['files']
+        return max(os.path.getmtime(os.path.join(Config.SHARD_DIR, name)) for name in names)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error reading database version: {e}")
+        return None
+
+def get_platforms() -> list:
+    """
+    Retrieve distinct platforms from every shard.
+
+    Returns:
+        A list of platform names.
+    """
+    query = """
+    SELECT DISTINCT json_each.value AS platform
+    FROM steam_games,
+         json_each(platforms)
+    """
+    partials = scatter_query(query)
+    if partials is None:
+        return []
+    return list(_concat(partials)['platform'].drop_duplicates())
+
+def get_platform_distribution(platform: Optional[str] = None) -> pd.DataFrame:
+    """
+    Get the distribution of games per platform.
+
+    Per-shard distinct game counts are added, as a game is never split across shards.
+
+    Args:
+        platform: Optional platform name to filter by.
+
+    Returns:
+        DataFrame with a count of games per platform.
+    """
+    query = """
+    SELECT
+        value AS platform,
+        COUNT(DISTINCT steam_appid) AS game_count
+    FROM steam_games,
+         json_each(platforms)
+    WHERE 1=1
+    {platform_filter}
+    GROUP BY value
+    """
+    platform_filter = "AND json_each.value = :platform" if platform else ""
+    params = {"platform": platform} if platform else None
+    partials = scatter_query(query.format(platform_filter=platform_filter), params)
+    if partials is None:
+        return pd.DataFrame()
+    merged = _concat(partials).groupby('platform', as_index=False, sort=False)['game_count'].sum()
+    return merged.sort_values('game_count', ascending=False, kind='stable').reset_index(drop=True)
+
+def _rounded_price_groups(expression: str, alias: str) -> Optional[pd.DataFrame]:
+    # Partial of the price_data_filtered CTE: distinct game counts per (platforms, group). The
+    # HAVING clause needs the total count, so it is applied after merging.
+    query = f"""
+    SELECT
+        platforms,
+        {expression} AS {alias},
+        COUNT(DISTINCT steam_appid) AS game_count
+    FROM steam_games
+    WHERE "price_initial (USD)" > 0
+    GROUP BY platforms, {alias}
+    """
+    partials = scatter_query(query)
+    if partials is None:
+        return None
+    merged = _concat(partials).groupby(['platforms', alias], as_index=False, sort=False)['game_count'].sum()
+    return merged[merged['game_count'] > 5]
+
+def get_price_distribution(platform: Optional[str] = None) -> pd.DataFrame:
+    """
+    Compute distribution of game prices by platform.
+
+    Shards return game counts per (platforms, rounded price); the groups with more than 5 games
+    overall are then aggregated per platform, as in queries.get_price_distribution.
+
+    Args:
+        platform: Optional platform name to filter by.
+
+    Returns:
+        DataFrame with average, minimum, and maximum price per platform.
+    """
+    groups = _rounded_price_groups('ROUND(CAST("price_initial (USD)" AS FLOAT) / 5.0) * 5', 'rounded_price')
+    if groups is None:
+        return pd.DataFrame()
+    rows = _explode_platforms(groups, platform)
+    merged = rows.groupby('platform', sort=False).agg(
+        avg_price=('rounded_price', 'mean'),
+        min_price=('rounded_price', 'min'),
+        max_price=('rounded_price', 'max'),
+        game_count=('game_count', 'sum')
+    )
+    merged = merged.sort_values('game_count', ascending=False, kind='stable').reset_index()
+    return merged[['platform', 'avg_price', 'min_price', 'max_price']]
+
+def get_review_distribution(platform: Optional[str] = None) -> pd.DataFrame:
+    """
+    Retrieve review distribution by category for games.
+
+    Args:
+        platform: Optional platform name to filter by.
+
+    Returns:
+        DataFrame with game count for each review category.
+    """
+    query = """
+    SELECT
+        review_score_desc AS review_category,
+        COUNT(DISTINCT steam_appid) AS game_count
+    FROM steam_games,
+         json_each(platforms)
+    WHERE review_score_desc NOT LIKE '%user reviews%'
+    {platform_filter}
+    GROUP BY review_category
+    """
+    platform_filter = "AND json_each.value = :platform" if platform else ""
+    params = {"platform": platform} if platform else None
+    partials = scatter_query(query.format(platform_filter=platform_filter), params)
+    if partials is None:
+        return pd.DataFrame()
+    merged = _concat(partials).groupby('review_category', as_index=False, sort=False)['game_count'].sum()
+    return merged.sort_values('game_count', ascending=False, kind='stable').reset_index(drop=True)
+
+def get_top_games(platform: Optional[str] = None) -> pd.DataFrame:
+    """
+    Retrieve the top 5 games based on metacritic score and review count.
+
+    Each shard returns its own top 5, which together contain the overall top 5.
+
+    Args:
+        platform: Optional platform name to filter by.
+
+    Returns:
+        DataFrame containing details of the top games.
+    """
+    query = """
+    SELECT
+        name,
+        review_score,
+        total_reviews,
+        metacritic,
+        "price_initial (USD)"
+    FROM steam_games,
+         json_each(platforms)
+    WHERE metacritic IS NOT NULL
+      AND total_reviews > 1000
+    {platform_filter}
+    GROUP BY steam_appid
+    ORDER BY metacritic DESC, total_reviews DESC
+    LIMIT 5
+    """
+    platform_filter = "AND json_each.value = :platform" if platform else ""
+    params = {"platform": platform} if platform else None
+    partials = scatter_query(query.format(platform_filter=platform_filter), params)
+    if partials is None:
+        return pd.DataFrame()
+    merged = _concat(partials).sort_values(['metacritic', 'total_reviews'], ascending=False, kind='stable')
+    return merged.head(5).reset_index(drop=True)
+
+def get_price_band_distribution(platform: Optional[str] = None) -> pd.DataFrame:
+    """
+    Count the number of games that fall into predefined price bands.
+
+    Shards return game counts per (platforms, price band); bands with more than 5 games overall
+    (per platform combination) are then summed per band, as in queries.get_price_band_distribution.
+
+    Args:
+        platform: Optional platform name to filter by.
+
+    Returns:
+        DataFrame with price bands and corresponding game counts.
+    """
+    bracket = """CASE
+                WHEN "price_initial (USD)" <= 30 THEN '0-30'
+                WHEN "price_initial (USD)" <= 60 THEN '31-60'
+                WHEN "price_initial (USD)" <= 90 THEN '61-90'
+                WHEN "price_initial (USD)" <= 120 THEN '91-120'
+                ELSE '>120'
+            END"""
+    groups = _rounded_price_groups(bracket, 'price_bracket')
+    if groups is None:
+        return pd.DataFrame()
+    rows = _explode_platforms(groups, platform)
+    return rows.groupby('price_bracket', as_index=False)['game_count'].sum()
+
+# Numeric columns that can be plotted against price, mapped to their SQL expressions
+DENSITY_COLUMNS = {
+    'review_score': 'review_score',
+    'metacritic': 'metacritic',
+}
+
+_PLATFORM_EXISTS = "AND EXISTS (SELECT 1 FROM json_each(platforms) WHERE json_each.value = :platform)"
+
+def get_price_review_extent(y_column: str, platform: Optional[str] = None) -> pd.DataFrame:
+    """
+    Get the range of price and of a review column, over games with both values.
+
+    Args:
+        y_column: Review column to plot against price (a key of DENSITY_COLUMNS).
+        platform: Optional platform name to filter by.
+
+    Returns:
+        DataFrame with a single row of 'x_min', 'x_max', 'y_min' and 'y_max'.
+    """
+    query = """
+    SELECT
+        MIN("price_initial (USD)") AS x_min,
+        MAX("price_initial (USD)") AS x_max,
+        MIN({y}) AS y_min,
+        MAX({y}) AS y_max
+    FROM steam_games
+    WHERE "price_initial (USD)" IS NOT NULL
+      AND {y} IS NOT NULL
+    {platform_filter}
+    """
+    platform_filter = _PLATFORM_EXISTS if platform else ""
+    params = {"platform": platform} if platform else None
+    partials = scatter_query(query.format(y=DENSITY_COLUMNS[y_column], platform_filter=platform_filter), params)
+    if partials is None:
+        return pd.DataFrame()
+    merged = _concat(partials)
+    return pd.DataFrame([{
+        'x_min': merged['x_min'].min(),
+        'x_max': merged['x_max'].max(),
+        'y_min': merged['y_min'].min(),
+        'y_max': merged['y_max'].max(),
+    }])
+
+def get_price_review_bins(
+    y_column: str,
+    x_range: tuple,
+    y_range: tuple,
+    bins: tuple,
+    platform: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Count games on a 2D grid of price against a review column.
+
+    Every shard bins its games on the same grid, so the per-cell counts are added.
+
+    Args:
+        y_column: Review column to plot against price (a key of DENSITY_COLUMNS).
+        x_range: (min, max) price range to bin.
+        y_range: (min, max) review range to bin.
+        bins: Number of (x, y) cells.
+        platform: Optional platform name to filter by.
+
+    Returns:
+        DataFrame with 'x_bin', 'y_bin' and 'game_count' for each non-empty cell.
+    """
+    query = """
+    SELECT
+        MIN(CAST(("price_initial (USD)" - :x0) / :dx AS INTEGER), :nx - 1) AS x_bin,
+        MIN(CAST(({y} - :y0) / :dy AS INTEGER), :ny - 1) AS y_bin,
+        COUNT(*) AS game_count
+    FROM steam_games
+    WHERE "price_initial (USD)" BETWEEN :x0 AND :x1
+      AND {y} BETWEEN :y0 AND :y1
+    {platform_filter}
+    GROUP BY x_bin, y_bin
+    """
+    platform_filter = _PLATFORM_EXISTS if platform else ""
+    (x0, x1), (y0, y1), (nx, ny) = x_range, y_range, bins
+    params = {
+        "x0": x0, "x1": x1, "dx": (x1 - x0) / nx, "nx": nx,
+        "y0": y0, "y1": y1, "dy": (y1 - y0) / ny, "ny": ny,
+    }
+    if platform:
+        params["platform"] = platform
+    partials = scatter_query(query.format(y=DENSITY_COLUMNS[y_column], platform_filter=platform_filter), params)
+    if partials is None:
+        return pd.DataFrame()
+    return _concat(partials).groupby(['x_bin', 'y_bin'], as_index=False)['game_count'].sum()
+
+def _iter_shard(engine: Engine, query: str, params: Dict[str, Any], batch_size: int) -> Iterator[list]:
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=batch_size).execute(text(query), params)
+        yield list(result.keys())
+        for partition in result.partitions(batch_size):
+            yield partition
+
+def stream_games(
+    platform: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_review: Optional[float] = None,
+    max_review: Optional[float] = None,
+    review_category: Optional[str] = None,
+    batch_size: int = 1000
+) -> Iterator[list]:
+    """
+    Stream the rows of 'steam_games' matching the given filters, one shard after another.
+
+    Rows come out grouped by shard rather than in the order of the unsharded table.
+
+    Args:
+        platform: Optional platform name to filter by.
+        min_price: Optional lower bound on the initial price (inclusive).
+        max_price: Optional upper bound on the initial price (inclusive).
+        min_review: Optional lower bound on review_score (inclusive).
+        max_review: Optional upper bound on review_score (inclusive).
+        review_category: Optional exact review_score_desc to filter by.
+        batch_size: Maximum number of rows per batch.
+
+    Yields:
+        The column names, then lists of rows.
+    """
+    query = """
+    SELECT *
+    FROM steam_games
+    WHERE 1=1
+    {filters}
+    """
+    conditions = {
+        "platform": _PLATFORM_EXISTS,
+        "min_price": 'AND "price_initial (USD)" >= :min_price',
+        "max_price": 'AND "price_initial (USD)" <= :max_price',
+        "min_review": "AND review_score >= :min_review",
+        "max_review": "AND review_score <= :max_review",
+        "review_category": "AND review_score_desc = :review_category",
+    }
+    values = {
+        "platform": platform,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_review": min_review,
+        "max_review": max_review,
+        "review_category": review_category,
+    }
+    params = {key: value for key, value in values.items() if value is not None}
+    final_query = query.format(filters="\n    ".join(conditions[key] for key in params))
+    try:
+        for index, engine in enumerate(get_shards()):
+            rows = _iter_shard(engine, final_query, params, batch_size)
+            try:
+                columns = next(rows)
+                if index == 0:
+                    yield columns
+                yield from rows
+            finally:
+                # Release the shard's cursor when the consumer stops early
+                rows.close()
+    except Exception as e:
+        # Re-raise so a consumer never mistakes a short read for the complete result
+        print(f"Error streaming sharded query: {e}")
+        raise
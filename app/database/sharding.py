@@ -0,0 +1,224 @@
+"""
+Tooling for the sharded SQLite storage used by queries_sharded.py.
+
+Usage:
+    python -m app.database.sharding reshard --shards 4 --target shards/   # split data.db into 4 shards
+    python -m app.database.sharding reshard --source shards/ --shards 8 --target shards/   # reshard in place
+    python -m app.database.sharding check --target shards/               # compare with the unsharded queries
+
+The source is the unsharded database (SQLITE_DATABASE_PATH or app/database/data.db by default)
+or an existing shard directory. Shards are built next to the target and swapped in when complete.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from app.database import queries_sharded
+from app.database.queries_sharded import MANIFEST_NAME, SHARD_HASH_SQL, read_manifest, shard_for
+
+# Allowed ratio between the mean shard size and the largest (or smallest) shard, for `check`
+MAX_SHARD_SKEW = 1.5
+
+# Functions compared by `check`, for all platforms and for each platform
+CHECKED_FUNCTIONS = [
+    'get_platform_distribution',
+    'get_price_distribution',
+    'get_review_distribution',
+    'get_top_games',
+    'get_price_band_distribution',
+]
+
+def _source_files(source: str) -> List[str]:
+    # A shard directory (for resharding) or a single database file
+    if os.path.isdir(source):
+        return [os.path.join(source, name) for name in read_manifest(source)['files']]
+    return [source]
+
+def _build_shard(sources: List[str], path: str, shard: int, shard_count: int) -> int:
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        with engine.connect() as conn:
+            for index, source in enumerate(sources):
+                conn.exec_driver_sql("ATTACH DATABASE ? AS source", (source,))
+                if index == 0:
+                    # Same table definition and indexes as the source
+                    ddl = conn.execute(text(
+                        "SELECT sql FROM source.sqlite_master "
+                        "WHERE tbl_name = 'steam_games' AND sql IS NOT NULL ORDER BY type DESC"
+                    )).scalars().all()
+                    for statement in ddl:
+                        conn.exec_driver_sql(statement)
+                conn.execute(
+                    text(f"INSERT INTO steam_games SELECT * FROM source.steam_games WHERE {SHARD_HASH_SQL} = :shard"),
+                    {'shard_count': shard_count, 'shard': shard}
+                )
+                conn.commit()
+                conn.exec_driver_sql("DETACH DATABASE source")
+            return conn.execute(text("SELECT COUNT(*) FROM steam_games")).scalar()
+    finally:
+        engine.dispose()
+
+def reshard(source: str, target: str, shard_count: int) -> Dict[str, int]:
+    """
+    Partition 'steam_games' by hash of steam_appid into `shard_count` SQLite files.
+
+    Shards are built in parallel in a temporary directory; the target directory is only
+    replaced once every shard and the manifest have been written.
+
+    Args:
+        source: The unsharded database file, or an existing shard directory.
+        target: The shard directory to create or replace.
+        shard_count: Number of shards.
+
+    Returns:
+        Row count per shard file.
+    """
+    sources = _source_files(source)
+    target = os.path.abspath(target)
+    building = f"{target}.tmp-{os.getpid()}"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    files = [f"shard_{shard:03d}.db" for shard in range(shard_count)]
+    try:
+        with ThreadPoolExecutor(max_workers=min(shard_count, os.cpu_count() or 1)) as executor:
+            counts = list(executor.map(
+                lambda shard: _build_shard(sources, os.path.join(building, files[shard]), shard, shard_count),
+                range(shard_count)
+            ))
+        with open(os.path.join(building, MANIFEST_NAME), 'w') as f:
+            json.dump({
+                'shard_count': shard_count,
+                'files': files,
+                'rows': counts,
+                'hash': SHARD_HASH_SQL,
+                'created_at': time.time()
+            }, f, indent=2)
+    except Exception:
+        shutil.rmtree(building, ignore_errors=True)
+        raise
+
+    # Swap the new shard set in
+    previous = f"{target}.old-{os.getpid()}"
+    if os.path.exists(target):
+        os.rename(target, previous)
+    os.rename(building, target)
+    shutil.rmtree(previous, ignore_errors=True)
+    return dict(zip(files, counts))
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Sort rows and round floats so result sets from different plans can be compared."""
+    if df.empty:
+        return df
+    df = df.round(6)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+def check(target: str) -> List[str]:
+    """
+    Compare the sharded results with the unsharded queries, and check each row's shard placement.
+
+    Args:
+        target: The shard directory.
+
+    Returns:
+        A description of each mismatch; empty when the shards are consistent.
+    """
+    from app.database import queries
+
+    mismatches = []
+    queries_sharded.Config.SHARD_DIR = target
+    manifest = read_manifest(target)
+
+    # Every row is in the shard its steam_appid hashes to
+    sizes = []
+    for shard, engine in enumerate(queries_sharded.get_shards()):
+        with engine.connect() as conn:
+            appids = conn.execute(text("SELECT steam_appid FROM steam_games")).scalars().all()
+        sizes.append(len(appids))
+        misplaced = sum(1 for appid in appids if shard_for(appid, manifest['shard_count']) != shard)
+        if misplaced:
+            mismatches.append(f"{manifest['files'][shard]}: {misplaced} rows belong to another shard")
+
+    # Shards are scanned in parallel, so the largest one bounds the query time
+    mean = sum(sizes) / len(sizes)
+    if mean and (max(sizes) > MAX_SHARD_SKEW * mean or min(sizes) < mean / MAX_SHARD_SKEW):
+        mismatches.append(f"shard sizes are skewed: {sizes} rows, mean {mean:.0f}")
+
+    platforms = queries.get_platforms()
+    if sorted(queries_sharded.get_platforms()) != sorted(platforms):
+        mismatches.append('get_platforms: platform lists differ')
+
+    for func in CHECKED_FUNCTIONS:
+        for platform in [None] + platforms:
+            expected = getattr(queries, func)(platform)
+            actual = getattr(queries_sharded, func)(platform)
+            if func == 'get_top_games':
+                # Ties on metacritic and total_reviews may be broken differently
+                actual, expected = actual[['metacritic', 'total_reviews']], expected[['metacritic', 'total_reviews']]
+            if not _normalize(actual).equals(_normalize(expected)):
+                mismatches.append(f"{func}({platform!r}): sharded result differs from unsharded query")
+
+    for y_column in queries.DENSITY_COLUMNS:
+        for platform in [None] + platforms:
+            expected = queries.get_price_review_extent(y_column, platform)
+            actual = queries_sharded.get_price_review_extent(y_column, platform)
+            if not _normalize(actual.astype(float)).equals(_normalize(expected.astype(float))):
+                mismatches.append(f"get_price_review_extent({y_column!r}, {platform!r}): sharded result differs")
+                continue
+            row = expected.iloc[0]
+            if pd.isna(row['x_min']):
+                continue
+            grid = ((row['x_min'], row['x_max'] + 1), (row['y_min'], row['y_max'] + 1), (40, 30))
+            expected = queries.get_price_review_bins(y_column, *grid, platform)
+            actual = queries_sharded.get_price_review_bins(y_column, *grid, platform)
+            if not _normalize(actual).equals(_normalize(expected)):
+                mismatches.append(f"get_price_review_bins({y_column!r}, {platform!r}): sharded result differs")
+
+    def stream_rows(stream):
+        columns = next(stream, None)
+        rows = [tuple(row) for batch in stream for row in batch]
+        return columns, sorted(rows, key=repr)
+
+    if stream_rows(queries_sharded.stream_games()) != stream_rows(queries.stream_games()):
+        mismatches.append('stream_games: sharded rows differ from unsharded rows')
+    return mismatches
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Build and check the sharded steam_games storage.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    reshard_parser = subparsers.add_parser('reshard', help='partition steam_games into shard files')
+    reshard_parser.add_argument('--source', help='unsharded database file or shard directory (default: the SQLite database)')
+    reshard_parser.add_argument('--target', required=True, help='shard directory to create or replace')
+    reshard_parser.add_argument('--shards', type=int, required=True, help='number of shards')
+    check_parser = subparsers.add_parser('check', help='compare the shards with the unsharded database')
+    check_parser.add_argument('--target', required=True, help='shard directory')
+    args = parser.parse_args(argv)
+
+    if args.command == 'reshard':
+        if args.shards < 1:
+            parser.error('--shards must be at least 1')
+        if args.source is None:
+            from app.database.queries import DATABASE_PATH
+            args.source = DATABASE_PATH
+        started = time.perf_counter()
+        for name, rows in reshard(args.source, args.target, args.shards).items():
+            print(f"{name}: {rows} rows")
+        print(f"Resharded into {args.shards} shards in {time.perf_counter() - started:.2f}s")
+    elif args.command == 'check':
+        mismatches = check(args.target)
+        for mismatch in mismatches:
+            print(mismatch)
+        print("OK" if not mismatches else f"{len(mismatches)} mismatches")
+        return 1 if mismatches else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
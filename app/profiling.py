@@ -0,0 +1,352 @@
+import hmac
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+from flask import current_app, request
+
+from app.admission import TokenBucket
+from app.serialization import dumps, loads
+
+# Stages a sample is attributed to, by the libraries found on its stack. SQL wins over the
+# others (pandas.read_sql calls into SQLAlchemy); otherwise the innermost library frame decides.
+STAGE_PACKAGES = {
+    'sql': ('sqlalchemy', 'sqlite3', 'psycopg2', 'psycopg'),
+    'pandas': ('pandas', 'numpy'),
+    'altair': ('altair', 'jsonschema', 'referencing'),
+    'jinja': ('jinja2', 'markupsafe'),
+}
+
+# Values of X-Profile / ?profile= that request a profile; 'uncached' also recomputes the payload
+PROFILE_MODES = ('1', 'uncached')
+
+# Hard cap on the length of one profile, whatever the request does
+MAX_PROFILE_SECONDS = 30.0
+
+def _package_of(filename: str) -> Optional[str]:
+    parts = filename.replace('\\', '/').split('/')
+    for stage, packages in STAGE_PACKAGES.items():
+        if any(package in parts for package in packages):
+            return stage
+    return None
+
+def _short_path(filename: str) -> str:
+    # Keep paths readable and free of host details: relative to site-packages or the project
+    filename = filename.replace('\\', '/')
+    for marker in ('/site-packages/', '/dist-packages/'):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__))).replace('\\', '/') + '/'
+    return filename[len(root):] if filename.startswith(root) else os.path.basename(filename)
+
+class SamplingProfiler:
+    """
+    Samples the call stack of one thread at a fixed interval from a background thread.
+
+    Only the stack of the profiled thread is recorded, so other requests served by the same
+    worker are not affected beyond the sampling thread's own CPU time.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005, max_seconds: float = MAX_PROFILE_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.frames: List[Dict[str, Any]] = []
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+        self.stages: List[str] = []
+        self._frame_ids: Dict[tuple, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='chartviz-profiler', daemon=True)
+        self.started_at = 0.0
+        self.duration = 0.0
+
+    def _frame_id(self, code, line: int) -> int:
+        key = (code, line)
+        frame_id = self._frame_ids.get(key)
+        if frame_id is None:
+            frame_id = self._frame_ids[key] = len(self.frames)
+            self.frames.append({
+                'name': getattr(code, 'co_qualname', code.co_name),
+                'file': _short_path(code.co_filename),
+                'line': line
+            })
+        return frame_id
+
+    def _sample(self, weight: float) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack, stage, innermost = [], None, None
+        while frame is not None:
+            package = _package_of(frame.f_code.co_filename)
+            if package == 'sql':
+                stage = 'sql'
+            elif package and innermost is None:
+                innermost = package
+            stack.append(self._frame_id(frame.f_code, frame.f_lineno))
+            frame = frame.f_back
+        stack.reverse()
+        self.samples.append(stack)
+        self.weights.append(weight)
+        self.stages.append(stage or innermost or 'app')
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        deadline = last + self.max_seconds
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+            if now >= deadline:
+                break
+
+    def start(self) -> None:
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self, **meta) -> Dict[str, Any]:
+        """The profile as a JSON-serializable dict, with per-stage time totals."""
+        stage_seconds = Counter()
+        for stage, weight in zip(self.stages, self.weights):
+            stage_seconds[stage] += weight
+        return {
+            **meta,
+            'started_at': self.started_at,
+            'duration': self.duration,
+            'interval': self.interval,
+            'sample_count': len(self.samples),
+            'stages': {stage: round(seconds, 6) for stage, seconds in stage_seconds.items()},
+            'frames': self.frames,
+            'samples': self.samples,
+            'weights': self.weights,
+            'sample_stages': self.stages
+        }
+
+class ProfileStore:
+    """
+    Bounded on-disk store of captured profiles, shared by every worker process on the host.
+
+    Only the most recent `max_profiles` profiles are kept; older ones are deleted on write.
+    """
+
+    def __init__(self, directory: str, max_profiles: int = 20):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f'{profile_id}.json')
+
+    def save(self, profile: Dict[str, Any]) -> None:
+        """Store a profile atomically and drop the oldest ones beyond the limit."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(dumps(profile))
+            os.replace(tmp_path, self._path(profile['id']))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        for path in self._paths()[self.max_profiles:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _paths(self) -> List[str]:
+        # Most recent first
+        paths = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                try:
+                    paths.append((os.stat(path).st_mtime_ns, path))
+                except OSError:
+                    pass
+        return [path for _, path in sorted(paths, reverse=True)]
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        """Read a profile, or None if it does not exist (or was evicted)."""
+        try:
+            uuid.UUID(hex=profile_id)
+        except ValueError:
+            return None
+        try:
+            with open(self._path(profile_id), 'rb') as f:
+                return loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries of the stored profiles, most recent first."""
+        summaries = []
+        for path in self._paths():
+            try:
+                with open(path, 'rb') as f:
+                    profile = loads(f.read())
+            except (OSError, ValueError):
+                continue
+            summaries.append({
+                key: profile[key]
+                for key in ('id', 'method', 'path', 'pid', 'started_at', 'duration', 'sample_count', 'stages')
+            })
+        return summaries
+
+def to_collapsed(profile: Dict[str, Any]) -> str:
+    """
+    Render a profile as collapsed stacks (Brendan Gregg's flamegraph.pl / inferno input).
+
+    Each line is a semicolon-separated stack, rooted at the sample's stage, followed by the
+    time spent in it in microseconds.
+    """
+    names = [f"{frame['name']} ({frame['file']}:{frame['line']})" for frame in profile['frames']]
+    totals = Counter()
+    for stack, weight, stage in zip(profile['samples'], profile['weights'], profile['sample_stages']):
+        totals[';'.join([f'[{stage}]'] + [names[index] for index in stack])] += weight
+    return ''.join(f"{stack} {max(1, round(seconds * 1e6))}\n" for stack, seconds in totals.items())
+
+def to_speedscope(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Render a profile in speedscope's file format (https://www.speedscope.app)."""
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': f"{profile['method']} {profile['path']}",
+        'exporter': 'chartviz',
+        'activeProfileIndex': 0,
+        'shared': {'frames': profile['frames']},
+        'profiles': [{
+            'type': 'sampled',
+            'name': f"{profile['method']} {profile['path']} ({profile['id']})",
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': sum(profile['weights']),
+            'samples': profile['samples'],
+            'weights': profile['weights']
+        }]
+    }
+
+class Profiling:
+    """Profiling settings of one worker: access token, sampling interval and capture rate limit."""
+
+    def __init__(self, store: ProfileStore, token: str, interval: float = 0.005, per_minute: float = 6.0):
+        self.store = store
+        self.token = token
+        self.interval = interval
+        self._bucket = TokenBucket(per_minute / 60.0, max(1.0, per_minute))
+        self._lock = threading.Lock()
+        # One profile at a time per worker keeps the sampling overhead bounded
+        self._active = threading.Lock()
+
+    def authorized(self) -> bool:
+        """
+        Whether the current request carries the profiling token in the X-Profile-Token header.
+
+        The token is never read from the query string, which ends up in access logs, browser
+        history and Referer headers.
+        """
+        supplied = request.headers.get('X-Profile-Token', '')
+        return bool(self.token) and hmac.compare_digest(supplied.encode('utf-8'), self.token.encode('utf-8'))
+
+    def acquire(self) -> bool:
+        """Reserve a capture, subject to the rate limit and the one-at-a-time limit."""
+        if not self._active.acquire(blocking=False):
+            return False
+        with self._lock:
+            allowed = self._bucket.take() == 0
+        if not allowed:
+            self._active.release()
+        return allowed
+
+    def release(self) -> None:
+        self._active.release()
+
+def create_profiling(config, cache_dir: str) -> Optional[Profiling]:
+    """Create the profiling settings from the app configuration, or None if profiling is disabled."""
+    if not config.get('PROFILING_ENABLED', False):
+        return None
+    if not config.get('PROFILING_TOKEN'):
+        print("PROFILING_ENABLED is set without PROFILING_TOKEN; profiling stays disabled")
+        return None
+    return Profiling(
+        ProfileStore(os.path.join(cache_dir, 'profiles'), config.get('PROFILING_MAX_PROFILES', 20)),
+        config['PROFILING_TOKEN'],
+        interval=config.get('PROFILING_INTERVAL', 0.005),
+        per_minute=config.get('PROFILING_PER_MINUTE', 6.0)
+    )
+
+def get_profiling() -> Optional[Profiling]:
+    """Return the profiling settings of the current Flask app, or None if profiling is disabled."""
+    return current_app.extensions.get('profiling')
+
+def profile_requested() -> Optional[str]:
+    """
+    The requested profile mode, from the X-Profile header or profile query flag.
+
+    Returns:
+        One of PROFILE_MODES, or None for any other value (e.g. '0' or 'false').
+    """
+    mode = request.headers.get('X-Profile') or request.args.get('profile')
+    return mode if mode in PROFILE_MODES else None
+
+def recompute_requested() -> bool:
+    """Whether an authorized profiling request asked to recompute the payload instead of using the cache."""
+    profiling = get_profiling()
+    return profiling is not None and profile_requested() == 'uncached' and profiling.authorized()
+
+def profiled(view):
+    """
+    Capture a sampling profile of a view when the request asks for one.
+
+    The profile is stored under a new id returned in the X-Profile-Id header. Requests without
+    the token, or over the capture rate limit, are served normally with an X-Profile-Skipped header.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        profiling = get_profiling()
+        if profiling is None or not profile_requested():
+            return view(*args, **kwargs)
+        if not profiling.authorized():
+            skipped = 'unauthorized'
+        elif not profiling.acquire():
+            skipped = 'rate_limited'
+        else:
+            skipped = None
+        if skipped:
+            response = current_app.make_response(view(*args, **kwargs))
+            response.headers['X-Profile-Skipped'] = skipped
+            return response
+
+        try:
+            profiler = SamplingProfiler(threading.get_ident(), profiling.interval)
+            profiler.start()
+            try:
+                # Build the response inside the profile so template rendering is included
+                response = current_app.make_response(view(*args, **kwargs))
+            finally:
+                profiler.stop()
+            profile_id = uuid.uuid4().hex
+            profiling.store.save(profiler.to_dict(
+                id=profile_id,
+                method=request.method,
+                path=request.full_path.rstrip('?'),
+                pid=os.getpid()
+            ))
+        finally:
+            profiling.release()
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+    return wrapper
@@ -1,9 +1,20 @@
-from flask import Blueprint, render_template, request
+import math
+
+from flask import Blueprint, Response, abort, jsonify, render_template, request
+from app.admission import get_admission_controller, rate_limited
+from app.profiling import get_profiling, profiled, to_collapsed, to_speedscope
+from app.serialization import json_response
+from app.services.cache_service import get_payload_cache
 from app.services.dashboard_service import get_dashboard_data
+from app.services.density_service import get_price_review_density
+from app.services.export_service import ExportError, export_filename, export_games, export_mimetype
+from app.services.refresh_service import get_refresh_status
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
+@rate_limited
+@profiled
 def index():
     """Main dashboard page showing all charts"""
     
@@ -25,4 +36,123 @@ def index():
         platforms=valid_platforms,
         selected_platform=selected_platform,
         carouselIndex=carousel_index
-    )
\ No newline at end of file
+    )
+
+@main_bp.route('/api/charts')
+@rate_limited
+@profiled
+def charts_api():
+    """Vega-Lite specs for all dashboard charts, filtered by platform"""
+    _, _, charts = get_dashboard_data(request.args.get('platform', 'All'))
+    return json_response(charts.encode('utf-8'))
+
+def _float_range(low_arg, high_arg):
+    """Read a (low, high) range from two query parameters; None if either is missing or invalid"""
+    try:
+        low, high = float(request.args[low_arg]), float(request.args[high_arg])
+    except (KeyError, ValueError):
+        return None
+    if not (math.isfinite(low) and math.isfinite(high)):
+        return None
+    return (min(low, high), max(low, high))
+
+@main_bp.route('/api/charts/price-review-density')
+@rate_limited
+@profiled
+def price_review_density_api():
+    """Price vs review density chart, binned for the requested size and visible range"""
+    try:
+        width = int(request.args.get('width', 600))
+        height = int(request.args.get('height', 400))
+    except ValueError:
+        width, height = 600, 400
+
+    # Every zoom step is a new query, so it takes a computation slot (503 when overloaded)
+    with get_admission_controller().slot():
+        spec = get_price_review_density(
+            request.args.get('platform', 'All'),
+            y_column=request.args.get('y', 'review_score'),
+            width=width,
+            height=height,
+            x_range=_float_range('x0', 'x1'),
+            y_range=_float_range('y0', 'y1')
+        )
+    return json_response(spec)
+
+def _optional_float(arg):
+    """Read an optional numeric query parameter; None if missing, 400 if invalid"""
+    value = request.args.get(arg)
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        abort(400, f"Invalid value for {arg}")
+
+@main_bp.route('/api/export')
+@rate_limited
+def export():
+    """Stream the filtered steam_games rows as CSV, JSON Lines or Arrow IPC"""
+    export_format = request.args.get('format', 'csv')
+    compression = request.args.get('compression') or None
+    platform = request.args.get('platform', 'All')
+
+    try:
+        chunks = export_games(
+            export_format,
+            compression,
+            platform=None if platform == 'All' else platform,
+            min_price=_optional_float('min_price'),
+            max_price=_optional_float('max_price'),
+            min_review=_optional_float('min_review'),
+            max_review=_optional_float('max_review'),
+            review_category=request.args.get('review_category') or None
+        )
+    except ExportError as e:
+        abort(400, str(e))
+
+    return Response(
+        chunks,
+        mimetype=export_mimetype(export_format, compression),
+        headers={'Content-Disposition': f'attachment; filename={export_filename(export_format, compression)}'}
+    )
+
+@main_bp.route('/status/refresh')
+def refresh_status():
+    """Last background refresh time and duration, for monitoring"""
+    return jsonify(get_refresh_status(get_payload_cache()))
+
+@main_bp.route('/status/admission')
+def admission_status():
+    """Admission control counters of the worker that answers, for monitoring"""
+    return jsonify(get_admission_controller().status())
+
+def _profile_store():
+    """The profile store, if profiling is enabled and the request carries the token; 404 otherwise"""
+    profiling = get_profiling()
+    if profiling is None or not profiling.authorized():
+        abort(404)
+    return profiling.store
+
+@main_bp.route('/profiles')
+def profiles():
+    """Summaries of the stored request profiles"""
+    return jsonify(_profile_store().list())
+
+@main_bp.route('/profiles/<profile_id>.collapsed')
+def profile_collapsed(profile_id):
+    """A stored profile as collapsed stacks, for flamegraph tools"""
+    profile = _profile_store().get(profile_id) or abort(404)
+    return Response(
+        to_collapsed(profile),
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename={profile_id}.collapsed'}
+    )
+
+@main_bp.route('/profiles/<profile_id>.speedscope.json')
+def profile_speedscope(profile_id):
+    """A stored profile in speedscope format"""
+    profile = _profile_store().get(profile_id) or abort(404)
+    response = jsonify(to_speedscope(profile))
+    response.headers['Content-Disposition'] = f'attachment; filename={profile_id}.speedscope.json'
+    return response
\ No newline at end of file
@@ -0,0 +1,281 @@
+import contextvars
+import dataclasses
+import datetime
+import decimal
+import gzip
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import altair
+import numpy as np
+import pandas as pd
+from flask import Response, request
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+# Optional fast backends; the stdlib fallbacks produce the same output, only slower.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def _default(value: Any) -> Any:
+    """
+    Convert values the JSON backends do not support natively.
+
+    orjson already handles NumPy arrays and scalars (OPT_SERIALIZE_NUMPY), dates, UUIDs and
+    dataclasses; this covers the stdlib fallback, with the same output, plus pandas types and
+    Decimal (as a string, like Flask's default provider, so no precision is lost). Dates are
+    written in ISO 8601, which is what exports and the payload cache need.
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return value.isoformat()
+    if isinstance(value, pd.DataFrame):
+        return json.loads(value.to_json(orient='records'))
+    if isinstance(value, pd.Series):
+        return value.tolist()
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _http_date_default(value: Any) -> Any:
+    """_default, but with dates as HTTP dates (RFC 822), as Flask's default provider writes them."""
+    if isinstance(value, datetime.date):
+        return http_date(value)
+    return _default(value)
+
+def dumps(obj: Any, http_dates: bool = False) -> bytes:
+    """
+    Serialize an object to compact JSON bytes.
+
+    Args:
+        obj: The object to serialize. NumPy and pandas values are supported.
+        http_dates: Write dates and datetimes as HTTP dates, like Flask's jsonify, instead of ISO 8601.
+
+    Returns:
+        UTF-8 encoded JSON.
+    """
+    default = _http_date_default if http_dates else _default
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if http_dates:
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, default=default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def loads(data: Any) -> Any:
+    """Deserialize JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def html_safe(data: bytes) -> str:
+    """
+    Make JSON safe to embed in a <script> tag, as Jinja's tojson filter does.
+
+    The escaped characters can only occur inside JSON strings, where the \\u escapes are equivalent.
+    """
+    return (
+        data.decode('utf-8')
+        .replace('<', '\\u003c')
+        .replace('>', '\\u003e')
+        .replace('&', '\\u0026')
+        .replace("'", '\\u0027')
+    )
+
+# DataFrames referenced by the chart currently being serialized, keyed by dataset name.
+_chart_datasets: contextvars.ContextVar = contextvars.ContextVar('chart_datasets', default=None)
+
+def _collect_data(data):
+    """
+    Altair data transformer that defers DataFrame serialization to chart_to_json.
+
+    While chart_to_json is running, DataFrames are replaced by named datasets so Altair does
+    not convert every value to a Python object; outside of it, Altair's default transformer is used.
+    """
+    datasets = _chart_datasets.get()
+    if datasets is None or not isinstance(data, pd.DataFrame):
+        return altair.default_data_transformer(data)
+    for name, existing in datasets.items():
+        if existing is data:
+            return {'name': name}
+    name = f'data-{len(datasets)}'
+    datasets[name] = data
+    return {'name': name}
+
+altair.data_transformers.register('chartviz', _collect_data)
+altair.data_transformers.enable('chartviz')
+
+def chart_to_json(chart: altair.TopLevelMixin) -> bytes:
+    """
+    Serialize an Altair chart to a Vega-Lite JSON spec.
+
+    The spec is built without its data, and each DataFrame is encoded separately with pandas'
+    vectorized JSON writer and spliced in as a top-level named dataset. This avoids converting
+    every value to a Python object, as chart.to_dict() does. Floats keep 15 significant digits.
+
+    Args:
+        chart: The Altair chart to serialize.
+
+    Returns:
+        The Vega-Lite spec as UTF-8 JSON.
+    """
+    token = _chart_datasets.set({})
+    try:
+        spec = chart.to_dict()
+        datasets = _chart_datasets.get()
+    finally:
+        _chart_datasets.reset(token)
+
+    body = dumps(spec)
+    if not datasets:
+        return body
+
+    encoded = b','.join(
+        dumps(name) + b':' + df.to_json(orient='records', double_precision=15).encode('utf-8')
+        for name, df in datasets.items()
+    )
+    # Merge into an existing 'datasets' object or append one before the closing brace
+    if 'datasets' in spec:
+        marker = b'"datasets":{'
+        index = body.index(marker) + len(marker)
+        separator = b',' if spec['datasets'] else b''
+        return body[:index] + encoded + separator + body[index:]
+    return body[:-1] + b',"datasets":{' + encoded + b'}}'
+
+def join_json_object(members: Dict[str, bytes]) -> bytes:
+    """
+    Build a JSON object from already serialized member values.
+
+    Args:
+        members: Mapping of key to serialized JSON value.
+
+    Returns:
+        The JSON object as UTF-8 bytes.
+    """
+    return b'{' + b','.join(dumps(key) + b':' + value for key, value in members.items()) + b'}'
+
+class CompressedBodyCache:
+    """
+    Bounded LRU cache of compressed response bodies, keyed by body digest and encoding.
+
+    Repeat payloads (the same platform's charts) are compressed once and then served as bytes.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str, encoding: str, body: bytes) -> bytes:
+        """
+        Return the compressed body, compressing and caching it on a miss.
+
+        Args:
+            digest: Digest identifying the uncompressed body.
+            encoding: 'br' or 'gzip'.
+            body: The uncompressed body.
+
+        Returns:
+            The compressed bytes.
+        """
+        key = (digest, encoding)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=5)
+        else:
+            compressed = gzip.compress(body, compresslevel=6)
+
+        with self._lock:
+            self._entries[key] = compressed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+compressed_bodies = CompressedBodyCache()
+
+def json_response(body: bytes, status: int = 200, min_compress_size: int = 1024) -> Response:
+    """
+    Build a JSON response from serialized bytes.
+
+    Adds an ETag per content encoding (answering If-None-Match with 304) and, when the client
+    accepts it, a brotli or gzip encoded body taken from the compressed body cache.
+
+    Args:
+        body: Serialized JSON.
+        status: HTTP status code.
+        min_compress_size: Bodies smaller than this are sent uncompressed.
+
+    Returns:
+        The Flask response.
+    """
+    encoding: Optional[str] = None
+    if len(body) >= min_compress_size:
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            encoding = 'br'
+        elif accepted['gzip']:
+            encoding = 'gzip'
+
+    # Each encoding is a different representation, so it gets its own strong ETag
+    digest = hashlib.sha1(body).hexdigest()
+    etag = f'{digest}-{encoding}' if encoding else digest
+    if status == 200 and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(
+            compressed_bodies.get(digest, encoding, body) if encoding else body,
+            status=status,
+            mimetype='application/json'
+        )
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(etag)
+    return response
+
+class FastJSONProvider(JSONProvider):
+    """
+    Flask JSON provider backed by dumps/loads, used by jsonify and the tojson template filter.
+
+    Dates are written as HTTP dates, as with Flask's default provider.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            # Options such as sort_keys or indent are only supported by the stdlib encoder
+            kwargs.setdefault('default', _http_date_default)
+            return json.dumps(obj, **kwargs)
+        return dumps(obj, http_dates=True).decode('utf-8')
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, http_dates=True), mimetype='application/json')
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from flask import current_app
+
+from app.serialization import dumps, loads
+
+# Bumped whenever the payload layout changes, so entries written by older code are ignored
+CACHE_FORMAT = 2
+
+class PayloadCache:
+    """
+    File-backed cache of computed dashboard payloads.
+
+    Entries are written atomically to a directory shared by every worker process on the host,
+    so a payload computed by one worker (or by the background refresher) is served by all of them.
+    Each process keeps the last entry it read in memory and only re-reads the file when its
+    mtime changes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, name: str) -> str:
+        """
+        Return the file path used to store the given entry name.
+
+        Args:
+            name: The entry name (e.g. a platform or 'All').
+
+        Returns:
+            An absolute path inside the cache directory.
+        """
+        digest = hashlib.sha1(f'{CACHE_FORMAT}:{name}'.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f'{digest}.json')
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Read an entry from the cache.
+
+        Args:
+            name: The entry name.
+
+        Returns:
+            A dict with 'version', 'computed_at' and 'payload' keys, or None if there is no entry.
+        """
+        path = self.path_for(name)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._lock:
+            cached = self._entries.get(name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            with open(path, 'rb') as f:
+                entry = loads(f.read())
+        except (OSError, ValueError) as e:
+            print(f"Error reading cache entry {name}: {e}")
+            return None
+
+        with self._lock:
+            self._entries[name] = (mtime, entry)
+        return entry
+
+    def set(self, name: str, payload: Any, version: Any = None) -> Dict[str, Any]:
+        """
+        Store an entry in the cache, replacing any previous entry atomically.
+
+        Args:
+            name: The entry name.
+            payload: A JSON-serializable payload.
+            version: The dataset version the payload was computed from.
+
+        Returns:
+            The stored entry.
+        """
+        entry = {
+            'version': version,
+            'computed_at': time.time(),
+            'payload': payload
+        }
+        # Write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(dumps(entry))
+            os.replace(tmp_path, self.path_for(name))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return entry
+
+def get_payload_cache() -> PayloadCache:
+    """Return the payload cache registered on the current Flask app."""
+    return current_app.extensions['payload_cache']
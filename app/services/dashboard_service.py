@@ -1,10 +1,15 @@
-from app.database.queries import (
+from flask import current_app
+
+from app.admission import Overloaded, get_admission_controller
+from app.profiling import recompute_requested
+from app.database.backend import (
     get_platform_distribution,
     get_price_distribution,
     get_review_distribution,
     get_top_games,
     get_platforms,
     get_price_band_distribution,
+    get_dataset_version,
 )
 from app.charts import (
     platform_distribution,
@@ -13,8 +18,11 @@ from app.charts import (
     top_games,
     price_band_distribution,
 )
+from app.serialization import chart_to_json, html_safe, join_json_object
+from app.services.cache_service import get_payload_cache
+from app.services.refresh_service import RefreshScheduler
 
-def get_dashboard_data(requested_platform):
+def compute_dashboard_data(requested_platform):
     # Get unique platforms
     valid_platforms = get_platforms()
 
@@ -38,13 +46,68 @@ def get_dashboard_data(requested_platform):
     top_games_chart = top_games(df_top)
     price_band_chart = price_band_distribution(df_price_band)
     
-    # Convert charts to dictionaries for Vega-Lite
-    charts = {
-        'platform_chart': platform_chart.to_dict(),
-        'price_chart': price_chart.to_dict(),
-        'review_chart': review_chart.to_dict(),
-        'top_games': top_games_chart.to_dict(),
-        'price_box': price_band_chart.to_dict()
-    }
+    # Serialize all charts to a single Vega-Lite JSON document, safe to embed in the page
+    charts = html_safe(join_json_object({
+        'platform_chart': chart_to_json(platform_chart),
+        'price_chart': chart_to_json(price_chart),
+        'review_chart': chart_to_json(review_chart),
+        'top_games': chart_to_json(top_games_chart),
+        'price_box': chart_to_json(price_band_chart)
+    }))
     
-    return valid_platforms, selected_platform, charts
\ No newline at end of file
+    return valid_platforms, selected_platform, charts
+
+def build_dashboard_payload(requested_platform):
+    """Compute the dashboard data for a platform as a cacheable payload."""
+    valid_platforms, selected_platform, charts = compute_dashboard_data(requested_platform)
+    return {
+        'platforms': valid_platforms,
+        'selected_platform': selected_platform,
+        'charts': charts
+    }
+
+def get_valid_platforms():
+    """Return the platform list, from the cached 'All' payload when there is one."""
+    # The 'All' entry carries the platform list, so validation needs no query once it is cached
+    all_entry = get_payload_cache().get('All')
+    return all_entry['payload']['platforms'] if all_entry else get_platforms()
+
+def get_dashboard_data(requested_platform):
+    cache = get_payload_cache()
+    valid_platforms = get_valid_platforms()
+    name = requested_platform if requested_platform in valid_platforms else 'All'
+    entry = cache.get(name)
+    # A profiled request may ask to recompute, so the profile covers the queries and charts
+    recompute = recompute_requested()
+
+    if entry and not recompute and current_app.config.get('REFRESH_ENABLED', False):
+        # Stale-while-revalidate: the background scheduler replaces entries when the data changes
+        payload = entry['payload']
+    else:
+        version = get_dataset_version()
+        if entry and not recompute and entry['version'] == version:
+            payload = entry['payload']
+        else:
+            admission = get_admission_controller()
+            try:
+                with admission.slot():
+                    payload = cache.set(name, build_dashboard_payload(name), version)['payload']
+            except Overloaded:
+                # Under overload, serve the last good payload rather than failing the request
+                if not entry:
+                    raise
+                admission.count('served_stale')
+                payload = entry['payload']
+
+    return payload['platforms'], payload['selected_platform'], payload['charts']
+
+def create_refresh_scheduler(app):
+    """Create the background scheduler that keeps every dashboard payload in the app's cache fresh."""
+    return RefreshScheduler(
+        app.extensions['payload_cache'],
+        compute=build_dashboard_payload,
+        get_version=get_dataset_version,
+        get_platforms=get_platforms,
+        interval=app.config.get('REFRESH_INTERVAL', 300.0),
+        jitter=app.config.get('REFRESH_JITTER', 30.0)
+    )
@@ -0,0 +1,73 @@
+from app.database.backend import (
+    DENSITY_COLUMNS,
+    get_price_review_bins,
+    get_price_review_extent,
+)
+from app.charts import price_review_density
+from app.serialization import chart_to_json
+from app.services.dashboard_service import get_valid_platforms
+
+# Target size of one grid cell on screen, and bounds on the grid resolution per axis
+CELL_SIZE_PX = 8
+MIN_BINS = 5
+MAX_BINS = 200
+
+Y_TITLES = {
+    'review_score': 'Review Score',
+    'metacritic': 'Metacritic Score',
+}
+
+def grid_size(width, height):
+    """Number of (x, y) cells for a chart of the given pixel size."""
+    def bins(pixels):
+        return max(MIN_BINS, min(MAX_BINS, int(pixels) // CELL_SIZE_PX))
+    return bins(width), bins(height)
+
+def _padded(low, high):
+    # A zero-width range cannot be binned, so widen it around the single value
+    if low == high:
+        return low - 0.5, high + 0.5
+    return low, high
+
+def get_price_review_density(requested_platform, y_column='review_score', width=600, height=400, x_range=None, y_range=None):
+    """
+    Build the price vs review density chart as a Vega-Lite JSON spec.
+
+    Games are counted on a grid sized from the chart's pixel size, over the requested (visible)
+    range or the full data range. Only the grid cells are sent, so the payload size is bounded by
+    the chart size, whatever the number of games.
+    """
+    if y_column not in DENSITY_COLUMNS:
+        y_column = 'review_score'
+    platform = requested_platform if requested_platform in get_valid_platforms() else None
+
+    if x_range is None or y_range is None:
+        extent = get_price_review_extent(y_column, platform)
+        if extent.empty or extent['x_min'].isna().iloc[0]:
+            x_range, y_range = x_range or (0.0, 1.0), y_range or (0.0, 1.0)
+        else:
+            row = extent.iloc[0]
+            x_range = x_range or (float(row['x_min']), float(row['x_max']))
+            y_range = y_range or (float(row['y_min']), float(row['y_max']))
+    x_range, y_range = _padded(*x_range), _padded(*y_range)
+
+    nx, ny = grid_size(width, height)
+    df = get_price_review_bins(y_column, x_range, y_range, (nx, ny), platform)
+    if df.empty:
+        df = df.reindex(columns=['x_bin', 'y_bin', 'game_count'])
+
+    # Convert cell indices to cell edges for the whole grid at once
+    dx = (x_range[1] - x_range[0]) / nx
+    dy = (y_range[1] - y_range[0]) / ny
+    df['x_start'] = x_range[0] + df['x_bin'] * dx
+    df['x_end'] = df['x_start'] + dx
+    df['y_start'] = y_range[0] + df['y_bin'] * dy
+    df['y_end'] = df['y_start'] + dy
+
+    chart = price_review_density(
+        df[['x_start', 'x_end', 'y_start', 'y_end', 'game_count']],
+        Y_TITLES[y_column],
+        list(x_range),
+        list(y_range)
+    )
+    return chart_to_json(chart)
@@ -0,0 +1,201 @@
+import csv
+import io
+import itertools
+import zlib
+from typing import Iterator, Optional
+
+from app.database.backend import stream_games
+from app.serialization import brotli, dumps
+
+# Optional dependency for Arrow IPC exports
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+# Batches sampled to infer the Arrow schema before the stream starts
+ARROW_SCHEMA_SAMPLE_BATCHES = 10
+
+COMPRESSIONS = {
+    'gzip': ('application/gzip', 'gz'),
+    'br': ('application/x-brotli', 'br'),
+}
+
+class ExportError(ValueError):
+    """Raised when an export is requested in a format or compression that is not available."""
+
+def available_formats():
+    """Export formats usable with the installed packages."""
+    return [name for name in EXPORT_FORMATS if name != 'arrow' or pyarrow is not None]
+
+def available_compressions():
+    """Compressions usable with the installed packages."""
+    return [name for name in COMPRESSIONS if name != 'br' or brotli is not None]
+
+def _encode_csv(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate()
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+def _encode_jsonl(columns, batches):
+    for rows in batches:
+        yield b''.join(dumps(dict(zip(columns, row))) + b'\n' for row in rows)
+
+class _ChunkSink:
+    """Write-only file object collecting what the Arrow writer produces, drained after every batch."""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def _arrow_batch(rows, schema):
+    arrays = []
+    for index, field in enumerate(schema):
+        values = [row[index] for row in rows]
+        if pyarrow.types.is_string(field.type):
+            # Columns that were empty while the schema was sampled are exported as text
+            values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+        arrays.append(pyarrow.array(values, type=field.type))
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+def _encode_arrow(columns, batches, sample_batches=ARROW_SCHEMA_SAMPLE_BATCHES):
+    # An IPC stream has a single schema, so it is inferred from the first batches, which are held
+    # back until every column has a concrete type or the sample is complete
+    sample = []
+    schema = pyarrow.schema([(name, pyarrow.null()) for name in columns])
+    for rows in batches:
+        sample.append(rows)
+        inferred = pyarrow.schema([
+            (name, pyarrow.array([row[index] for row in rows]).type) for index, name in enumerate(columns)
+        ])
+        # Widen the types seen so far (e.g. null -> int64 -> double)
+        schema = pyarrow.unify_schemas([schema, inferred], promote_options='permissive')
+        if len(sample) >= sample_batches or not any(pyarrow.types.is_null(field.type) for field in schema):
+            break
+    schema = pyarrow.schema([
+        field.with_type(pyarrow.string()) if pyarrow.types.is_null(field.type) else field
+        for field in schema
+    ])
+
+    sink = _ChunkSink()
+    writer = pyarrow.ipc.new_stream(pyarrow.PythonFile(sink, mode='w'), schema)
+    for rows in itertools.chain(sample, batches):
+        writer.write_batch(_arrow_batch(rows, schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+def _compress(chunks, compression):
+    if compression == 'gzip':
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+        process, finish = compressor.compress, compressor.flush
+    else:
+        compressor = brotli.Compressor(quality=5)
+        process, finish = compressor.process, compressor.finish
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+def export_games(
+    export_format: str,
+    compression: Optional[str] = None,
+    batch_size: int = 1000,
+    **filters
+) -> Iterator[bytes]:
+    """
+    Stream filtered 'steam_games' rows encoded as CSV, JSON Lines or Arrow IPC.
+
+    Rows are read from the database and encoded `batch_size` at a time, so memory use does not
+    depend on the size of the export. Closing the returned generator (as the WSGI server does
+    when the client disconnects) stops the export and releases the database cursor. A database
+    error raises from the generator, so the response is aborted rather than truncated.
+
+    Args:
+        export_format: 'csv', 'jsonl' or 'arrow'.
+        compression: Optional 'gzip' or 'br'.
+        batch_size: Rows read and encoded per chunk.
+        **filters: Filters passed to stream_games.
+
+    Returns:
+        A generator of encoded chunks.
+    """
+    if export_format not in available_formats():
+        raise ExportError(f"Unsupported export format: {export_format}")
+    if compression and compression not in available_compressions():
+        raise ExportError(f"Unsupported compression: {compression}")
+
+    def generate():
+        rows = stream_games(batch_size=batch_size, **filters)
+        completed = False
+        try:
+            columns = next(rows, None)
+            if columns is None:
+                completed = True
+                return
+
+            if export_format == 'csv':
+                chunks = _encode_csv(columns, rows)
+            elif export_format == 'jsonl':
+                chunks = _encode_jsonl(columns, rows)
+            else:
+                chunks = _encode_arrow(columns, rows)
+            if compression:
+                chunks = _compress(chunks, compression)
+
+            for chunk in chunks:
+                if chunk:
+                    yield chunk
+            completed = True
+        except Exception as e:
+            # Propagate so the server aborts the response instead of ending it like a complete file
+            print(f"Export failed: {e}")
+            completed = None
+            raise
+        finally:
+            # Runs on GeneratorExit too, so a disconnected client releases the cursor here
+            rows.close()
+            if completed is False:
+                print("Export cancelled before completion")
+
+    return generate()
+
+def export_filename(export_format: str, compression: Optional[str] = None) -> str:
+    """File name offered to the client for an export."""
+    name = f"steam_games.{EXPORT_FORMATS[export_format][1]}"
+    return f"{name}.{COMPRESSIONS[compression][1]}" if compression else name
+
+def export_mimetype(export_format: str, compression: Optional[str] = None) -> str:
+    """Content type of an export."""
+    return COMPRESSIONS[compression][0] if compression else EXPORT_FORMATS[export_format][0]
@@ -0,0 +1,164 @@
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; every process then refreshes on its own
+    fcntl = None
+
+from app.services.cache_service import PayloadCache
+
+STATUS_ENTRY = 'refresh-status'
+
+class RefreshScheduler:
+    """
+    Background thread that keeps the payload cache warm.
+
+    At every tick (interval plus random jitter) the scheduler compares the dataset version with
+    the version it last refreshed from. When it changed, it recomputes the payload for 'All' and
+    for every platform and writes them to the shared cache, while requests keep being served
+    the previous payloads.
+
+    Every worker process starts a scheduler, but only the one holding an exclusive lock on
+    a file in the cache directory does any work, so refreshes happen once per host. If the
+    leader exits, the lock is released and another worker takes over on its next tick.
+    """
+
+    def __init__(
+        self,
+        cache: PayloadCache,
+        compute: Callable[[str], Any],
+        get_version: Callable[[], Any],
+        get_platforms: Callable[[], List[str]],
+        interval: float = 300.0,
+        jitter: float = 30.0
+    ):
+        self.cache = cache
+        self.compute = compute
+        self.get_version = get_version
+        self.get_platforms = get_platforms
+        self.interval = interval
+        self.jitter = jitter
+        self.lock_path = os.path.join(cache.directory, 'refresh.lock')
+        self._lock_file = None
+        self._last_version = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the scheduler thread if it is not already running."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='dashboard-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler thread and release leadership."""
+        self._stop.set()
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def next_delay(self) -> float:
+        """Return the delay before the next tick: the interval with jitter applied."""
+        return max(0.0, self.interval + random.uniform(-self.jitter, self.jitter))
+
+    def is_leader(self) -> bool:
+        """
+        Try to become the refreshing process for this host.
+
+        Returns:
+            True if this process holds the refresh lock.
+        """
+        if self._lock_file:
+            return True
+        if fcntl is None:
+            return True
+
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _run(self) -> None:
+        # The first tick runs immediately so a fresh deployment warms the cache straight away
+        delay = 0.0
+        while not self._stop.wait(delay):
+            try:
+                if self.is_leader():
+                    self.tick()
+            except Exception as e:
+                print(f"Error refreshing dashboard cache: {e}")
+            delay = self.next_delay()
+
+    def tick(self) -> bool:
+        """
+        Refresh all payloads if the dataset version changed since the last refresh.
+
+        Returns:
+            True if a refresh was performed.
+        """
+        version = self.get_version()
+        if self._last_version is not None and version == self._last_version:
+            return False
+        self.refresh(version)
+        return True
+
+    def refresh(self, version: Any = None) -> Dict[str, Any]:
+        """
+        Recompute and store the payload for 'All' and every platform.
+
+        Args:
+            version: The dataset version being refreshed from.
+
+        Returns:
+            The refresh status that was recorded.
+        """
+        started_at = time.time()
+        durations = {}
+        errors = {}
+
+        for name in ['All'] + list(self.get_platforms()):
+            key_started = time.perf_counter()
+            try:
+                self.cache.set(name, self.compute(name), version)
+            except Exception as e:
+                errors[name] = str(e)
+            durations[name] = round(time.perf_counter() - key_started, 4)
+
+        finished_at = time.time()
+        if not errors:
+            self._last_version = version
+
+        status = {
+            'pid': os.getpid(),
+            'version': version,
+            'last_refresh_started': started_at,
+            'last_refresh_finished': finished_at,
+            'last_refresh_duration': round(finished_at - started_at, 4),
+            'durations': durations,
+            'errors': errors
+        }
+        self.cache.set(STATUS_ENTRY, status, version)
+        return status
+
+def get_refresh_status(cache: PayloadCache) -> Dict[str, Any]:
+    """
+    Return the status of the last background refresh on this host.
+
+    Args:
+        cache: The payload cache the scheduler writes to.
+
+    Returns:
+        A dict with the last refresh time and duration, or an empty dict if none has run yet.
+    """
+    entry = cache.get(STATUS_ENTRY)
+    return entry['payload'] if entry else {}
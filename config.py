@@ -7,6 +7,35 @@ load_dotenv()
 class Config:
     """Base configuration."""
     DATABASE_URL = os.getenv("DATABASE_URL")
+    # PostgreSQL engine pool and query settings (app/database/queries_pgsql.py)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+    # Serve PostgreSQL aggregates from materialized views; enable after `pgsql_maintenance install`
+    PG_MATERIALIZED_VIEWS = os.getenv("PG_MATERIALIZED_VIEWS", "false").lower() == "true"
+    # Directory of SQLite shards (see app/database/sharding.py); when set, queries run on the shards
+    SHARD_DIR = os.getenv("SHARD_DIR")
+    # Shared on-disk cache of computed dashboard payloads
+    CACHE_DIR = os.getenv("CACHE_DIR")
+    # Background refresh of cached payloads when the dataset changes
+    REFRESH_ENABLED = os.getenv("REFRESH_ENABLED", "true").lower() == "true"
+    REFRESH_INTERVAL = float(os.getenv("REFRESH_INTERVAL", "300"))
+    REFRESH_JITTER = float(os.getenv("REFRESH_JITTER", "30"))
+    # Admission control: concurrent computations per worker, queue length and queue wait (seconds)
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "2"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "8"))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+    # Optional per-client rate limit (requests per second, with a burst allowance)
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
+    RATE_LIMIT = float(os.getenv("RATE_LIMIT", "5"))
+    RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "20"))
+    # On-demand request profiling, only for requests carrying PROFILING_TOKEN
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+    PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", "0.005"))
+    PROFILING_PER_MINUTE = float(os.getenv("PROFILING_PER_MINUTE", "6"))
+    PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "20"))
     
 class DevelopmentConfig(Config):
     """Development configuration."""
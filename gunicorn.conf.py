@@ -1,5 +1,7 @@
 import multiprocessing
 
+from config import Config
+
 # Gunicorn configuration for production
 
 # Binding
@@ -9,7 +11,9 @@ preload_app = False
 # Worker processes
 workers = multiprocessing.cpu_count() * 2 + 1
 worker_class = "gthread"
-threads = 2
+# More threads than ADMISSION_MAX_CONCURRENT + ADMISSION_MAX_QUEUE: requests over the admission
+# limits must reach the app to be shed, instead of waiting unseen in the listen backlog
+threads = 12
 
 # Timeouts
 timeout = 60
@@ -36,5 +40,14 @@ proc_name = None
 def on_starting(server):
     server.log.info("Starting Gunicorn server")
 
+def when_ready(server):
+    admitted = Config.ADMISSION_MAX_CONCURRENT + Config.ADMISSION_MAX_QUEUE
+    if server.cfg.threads <= admitted:
+        server.log.warning(
+            "threads (%s) should exceed ADMISSION_MAX_CONCURRENT + ADMISSION_MAX_QUEUE (%s), "
+            "otherwise overloaded requests queue in gunicorn and are never shed",
+            server.cfg.threads, admitted
+        )
+
 def on_exit(server):
     server.log.info("Stopping Gunicorn server")
\ No newline at end of file
@@ -0,0 +1,344 @@
+"""
+Load-testing harness for comparing gunicorn serving configurations.
+
+Starts the app under gunicorn with the given workers / worker class / threads against the
+bundled data.db or a generated synthetic dataset, drives the dashboard with a platform mix
+over a concurrency ramp and prints a JSON report (throughput, p50/p95/p99 latency, error
+rate and per-worker RSS for every step).
+
+Examples:
+    python loadtest.py --worker-class sync --workers 4
+    python loadtest.py --worker-class gthread --workers 2 --threads 8 --dataset synthetic --rows 50000
+    python loadtest.py --worker-class gevent --workers 2 --concurrency 8,32,128 --output gevent.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLED_DATASET = os.path.join(PROJECT_DIR, 'app', 'database', 'data.db')
+
+PLATFORMS = ['windows', 'mac', 'linux']
+REVIEW_CATEGORIES = [
+    'Overwhelmingly Positive', 'Very Positive', 'Positive', 'Mostly Positive', 'Mixed',
+    'Mostly Negative', 'Negative', 'Very Negative', '4 user reviews'
+]
+PRICES = [0, 0.99, 4.99, 9.99, 14.99, 19.99, 29.99, 39.99, 59.99, 69.99, 99.99, 149.99]
+
+def generate_synthetic_dataset(path: str, rows: int, seed: int = 0) -> None:
+    """
+    Write a synthetic 'steam_games' table with the columns the dashboard queries use.
+
+    Args:
+        path: Path of the SQLite file to create (overwritten if it exists).
+        rows: Number of games to generate.
+        seed: Random seed, so runs against the same size are comparable.
+    """
+    rng = random.Random(seed)
+    if os.path.exists(path):
+        os.remove(path)
+
+    conn = sqlite3.connect(path)
+    conn.execute("""
+    CREATE TABLE steam_games (
+        steam_appid INTEGER PRIMARY KEY,
+        name TEXT,
+        platforms TEXT,
+        "price_initial (USD)" REAL,
+        review_score INTEGER,
+        review_score_desc TEXT,
+        total_reviews INTEGER,
+        metacritic INTEGER
+    )
+    """)
+
+    def make_row(appid):
+        # Most games ship on Windows; Mac and Linux ports are less common
+        platforms = [p for p, share in zip(PLATFORMS, (0.98, 0.3, 0.2)) if rng.random() < share] or ['windows']
+        total_reviews = int(rng.paretovariate(1.2) * 10)
+        return (
+            appid,
+            f'Synthetic Game {appid}',
+            json.dumps(platforms),
+            rng.choice(PRICES),
+            rng.randint(0, 9),
+            rng.choice(REVIEW_CATEGORIES),
+            total_reviews,
+            rng.randint(20, 99) if rng.random() < 0.2 else None
+        )
+
+    conn.executemany(
+        'INSERT INTO steam_games VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        (make_row(appid) for appid in range(1, rows + 1))
+    )
+    conn.commit()
+    conn.close()
+
+def dataset_platforms(path: str) -> List[str]:
+    """Return the distinct platforms stored in a dataset."""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute('SELECT DISTINCT json_each.value FROM steam_games, json_each(platforms)').fetchall()
+    finally:
+        conn.close()
+    return sorted(row[0] for row in rows)
+
+def free_port() -> int:
+    """Return a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(args: argparse.Namespace, dataset: str, port: int, workdir: str) -> subprocess.Popen:
+    """
+    Start gunicorn with the serving configuration under test.
+
+    The project's gunicorn.conf.py is loaded first, then workers, worker class, threads,
+    bind address and pidfile are overridden from the command line.
+    """
+    env = dict(os.environ)
+    env.update({
+        'SQLITE_DATABASE_PATH': dataset,
+        'CACHE_DIR': os.path.join(workdir, 'cache'),
+        'REFRESH_ENABLED': 'true' if args.refresh else 'false',
+        'FLASK_ENV': 'production'
+    })
+    command = [
+        sys.executable, '-m', 'gunicorn',
+        '-c', os.path.join(PROJECT_DIR, 'gunicorn.conf.py'),
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(args.workers),
+        '--worker-class', args.worker_class,
+        '--threads', str(args.threads),
+        '--pid', os.path.join(workdir, 'gunicorn.pid'),
+        '--access-logfile', '/dev/null',
+        '--error-logfile', os.path.join(workdir, 'gunicorn.log'),
+        'wsgi:app'
+    ]
+    return subprocess.Popen(command, cwd=PROJECT_DIR, env=env)
+
+def wait_until_ready(port: int, timeout: float = 60.0) -> None:
+    """Block until the server answers HTTP requests."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/status/refresh')
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server did not start within {timeout} seconds')
+
+def worker_pids(master_pid: int) -> List[int]:
+    """Return the pids of the gunicorn workers forked by the master process (Linux only)."""
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name may contain spaces, so split after its closing parenthesis
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == master_pid:
+            pids.append(int(entry))
+    return sorted(pids)
+
+def rss_kb(pid: int) -> Optional[int]:
+    """Return the resident set size of a process in KiB, or None if it is gone."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def build_request_mix(platforms: List[str], paths: List[str], all_share: float) -> List[tuple]:
+    """
+    Build the weighted list of request targets.
+
+    'All' gets `all_share` of the traffic and the remainder is split evenly across platforms.
+    Every path is combined with every platform filter.
+    """
+    weights = [('All', all_share)]
+    if platforms:
+        weights += [(platform, (1 - all_share) / len(platforms)) for platform in platforms]
+    return [
+        (f'{path}?{urlencode({"platform": platform})}', weight / len(paths))
+        for path in paths
+        for platform, weight in weights
+    ]
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Return the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def run_step(port: int, mix: List[tuple], concurrency: int, duration: float, seed: int) -> Dict:
+    """
+    Drive the server with `concurrency` closed-loop clients for `duration` seconds.
+
+    Returns:
+        Request counts, throughput, latency percentiles (ms) and error rate for the step.
+    """
+    targets = [target for target, _ in mix]
+    weights = [weight for _, weight in mix]
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(client_id):
+        rng = random.Random(seed + client_id)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        local_latencies = []
+        local_errors = {}
+        while time.monotonic() < deadline:
+            target = rng.choices(targets, weights)[0]
+            started = time.perf_counter()
+            try:
+                conn.request('GET', target)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    local_errors[str(response.status)] = local_errors.get(str(response.status), 0) + 1
+                else:
+                    local_latencies.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException) as e:
+                local_errors[type(e).__name__] = local_errors.get(type(e).__name__, 0) + 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            for key, count in local_errors.items():
+                errors[key] = errors.get(key, 0) + count
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    error_count = sum(errors.values())
+    total = len(latencies) + error_count
+    to_ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'requests': total,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': to_ms(percentile(latencies, 50)),
+            'p95': to_ms(percentile(latencies, 95)),
+            'p99': to_ms(percentile(latencies, 99)),
+            'max': to_ms(latencies[-1] if latencies else None)
+        },
+        'error_rate': round(error_count / total, 4) if total else 0.0,
+        'errors': errors
+    }
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Load-test the dashboard under a gunicorn serving configuration.')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--worker-class', default='gthread', help='gunicorn worker class (sync, gthread, gevent, ...)')
+    parser.add_argument('--threads', type=int, default=2, help='threads per worker (gthread only)')
+    parser.add_argument('--dataset', default='bundled', help="'bundled', 'synthetic' or a path to a SQLite file")
+    parser.add_argument('--rows', type=int, default=20000, help='rows in the synthetic dataset')
+    parser.add_argument('--concurrency', default='1,4,16,32', help='comma-separated concurrency ramp')
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds per ramp step')
+    parser.add_argument('--warmup', type=float, default=3.0, help='seconds of single-client warmup before the ramp')
+    parser.add_argument('--paths', default='/', help='comma-separated paths to drive')
+    parser.add_argument('--all-share', type=float, default=0.4, help="share of requests for the 'All' platform filter")
+    parser.add_argument('--refresh', action='store_true', help='enable the background refresh scheduler')
+    parser.add_argument('--label', help='name for this configuration in the report')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='chartviz-loadtest-')
+
+    if args.dataset == 'synthetic':
+        dataset = os.path.join(workdir, 'synthetic.db')
+        generate_synthetic_dataset(dataset, args.rows, args.seed)
+    elif args.dataset == 'bundled':
+        dataset = BUNDLED_DATASET
+    else:
+        dataset = os.path.abspath(args.dataset)
+
+    mix = build_request_mix(dataset_platforms(dataset), args.paths.split(','), args.all_share)
+    port = free_port()
+    server = start_server(args, dataset, port, workdir)
+    try:
+        wait_until_ready(port)
+        if args.warmup:
+            run_step(port, mix, 1, args.warmup, args.seed)
+
+        steps = []
+        for concurrency in (int(value) for value in args.concurrency.split(',')):
+            step = run_step(port, mix, concurrency, args.duration, args.seed)
+            # Workers killed by the timeout are replaced with new pids, so look them up after each step
+            step['worker_rss_kb'] = {str(pid): rss_kb(pid) for pid in worker_pids(server.pid)}
+            steps.append(step)
+            print(
+                f"concurrency={concurrency} rps={step['throughput_rps']} "
+                f"p50={step['latency_ms']['p50']}ms p99={step['latency_ms']['p99']}ms "
+                f"errors={step['error_rate']:.2%}",
+                file=sys.stderr
+            )
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+    report = {
+        'label': args.label or f'{args.worker_class}-w{args.workers}-t{args.threads}',
+        'config': {
+            'workers': args.workers,
+            'worker_class': args.worker_class,
+            'threads': args.threads,
+            'dataset': args.dataset,
+            'rows': args.rows if args.dataset == 'synthetic' else None,
+            'paths': args.paths.split(','),
+            'all_share': args.all_share,
+            'refresh': args.refresh,
+            'cpu_count': os.cpu_count()
+        },
+        'steps': steps
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())